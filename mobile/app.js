@@ -16,6 +16,10 @@
 
   var GROUP_FIELD = "__group";
 
+  var BANGLA_DIGITS = "\u09e6\u09e7\u09e8\u09e9\u09ea\u09eb\u09ec\u09ed\u09ee\u09ef";
+
+  var PHONE_QUERY_MIN_DIGITS = 3;
+
 
 
   var adminSession = { loggedIn: false, expiresAt: 0 };
@@ -34,6 +38,10 @@
 
   var data = baseData;
 
+  var shardFiles = normalized.shards;
+
+  var searchIndex = null;
+
   var activeUpdatedAt = meta && meta.generatedAt ? meta.generatedAt : null;
 
 
@@ -190,6 +198,54 @@
 
 
 
+  function asciiDigits(text) {
+
+    var out = "";
+
+    for (var i = 0; i < text.length; i++) {
+
+      var digit = BANGLA_DIGITS.indexOf(text[i]);
+
+      out += digit === -1 ? text[i] : String(digit);
+
+    }
+
+    return out;
+
+  }
+
+
+
+  function canonicalPhone(value) {
+
+    var digits = asciiDigits(String(value || "")).replace(/[^0-9]+/g, "");
+
+    if (digits.indexOf("880") === 0 && digits.length > 10) return "0" + digits.slice(3);
+
+    if (digits.length === 10 && digits.charAt(0) === "1") return "0" + digits;
+
+    return digits;
+
+  }
+
+
+
+  function phoneQuery(query) {
+
+    var compact = asciiDigits(String(query || "").replace(/\s+/g, ""));
+
+    var digits = compact.replace(/[^0-9]+/g, "");
+
+    if (digits.length < PHONE_QUERY_MIN_DIGITS || digits.length < 0.75 * compact.length) return "";
+
+    if (digits.indexOf("880") === 0 && digits.length > 4) return "0" + digits.slice(3);
+
+    return digits;
+
+  }
+
+
+
   function getAdminPassword() {
 
     var p = window.PHONEBOOK_ADMIN_PASSWORD;
@@ -280,12 +336,58 @@
 
 
 
+  function decodeColumnar(payload) {
+
+    var headers = Array.isArray(payload.headers) ? payload.headers : [];
+
+    var columns = Array.isArray(payload.columns) ? payload.columns : [];
+
+    var dicts = Array.isArray(payload.dicts) ? payload.dicts : [];
+
+    var count = payload.count || 0;
+
+    var rows = new Array(count);
+
+    for (var r = 0; r < count; r++) rows[r] = {};
+
+    for (var c = 0; c < headers.length; c++) {
+
+      var column = columns[c] || [];
+
+      var dict = dicts[c];
+
+      for (var i = 0; i < count; i++) {
+
+        var value = dict ? dict[column[i]] : column[i];
+
+        rows[i][headers[c]] = value == null ? "" : value;
+
+      }
+
+    }
+
+    return rows;
+
+  }
+
+
+
   function normalizeIncomingData(rawData, rawMeta) {
 
     var metaOut = rawMeta && typeof rawMeta === "object" ? rawMeta : null;
 
     var groupsOut = [];
 
+    if (rawData && rawData.format === "columnar") {
+
+      var decoded = decodeColumnar(rawData);
+
+      var shards = Array.isArray(rawData.shards) ? rawData.shards : [];
+
+      return { rows: decoded, groups: computeGroupsFromRows(decoded), meta: metaOut, shards: shards };
+
+    }
+
 
 
     if (rawData && !Array.isArray(rawData) && typeof rawData === "object") {
@@ -318,7 +420,7 @@
 
       }
 
-      return { rows: combined, groups: groupsOut, meta: metaOut };
+      return { rows: combined, groups: groupsOut, meta: metaOut, shards: [] };
 
     }
 
@@ -326,7 +428,7 @@
 
     var rows = Array.isArray(rawData) ? deepClone(rawData) : [];
 
-    return { rows: rows, groups: computeGroupsFromRows(rows), meta: metaOut };
+    return { rows: rows, groups: computeGroupsFromRows(rows), meta: metaOut, shards: [] };
 
   }
 
@@ -1003,7 +1105,7 @@
     return match ? parseInt(match[1], 10) : Number.MAX_SAFE_INTEGER;
   }
 
-  var derived = data.map(function (record, idx) {
+  function deriveRecord(record, idx) {
 
     var parts = [];
 
@@ -1023,11 +1125,13 @@
 
     }
 
-    return { record: record, search: normalizeText(parts.join(" ")), originalIndex: idx };
+    var phones = phoneKey ? canonicalPhone(record && record[phoneKey]) : "";
+
+    return { record: record, search: normalizeText(parts.join(" ")), phones: phones, originalIndex: idx };
 
-  });
+  }
 
-  derived.sort(function (a, b) {
+  function compareDerived(a, b) {
     var officerGroup = "\u0995\u09b0\u09cd\u09ae\u0995\u09b0\u09cd\u09a4\u09be";
     var ga = a.record[GROUP_FIELD];
     var gb = b.record[GROUP_FIELD];
@@ -1039,7 +1143,13 @@
     }
 
     return a.originalIndex - b.originalIndex;
-  });
+  }
+
+  var derived = data.map(deriveRecord);
+
+  var derivedById = derived.slice();
+
+  derived.sort(compareDerived);
 
 
 
@@ -3321,10 +3431,106 @@
 
 
 
+  function ngrams(text, size) {
+
+    var out = [];
+
+    for (var i = 0; i + size <= text.length; i++) out.push(text.slice(i, i + size));
+
+    return out;
+
+  }
+
+
+
+  function indexCandidates(postings, common, grams) {
+
+    var rarest = null;
+
+    for (var i = 0; i < grams.length; i++) {
+
+      if (common && common[grams[i]]) continue;
+
+      var ids = postings[grams[i]];
+
+      if (!ids) return [];
+
+      if (!rarest || ids.length < rarest.length) rarest = ids;
+
+    }
+
+    if (!rarest) return null;
+
+    var out = new Array(rarest.length);
+
+    var total = 0;
+
+    for (var j = 0; j < rarest.length; j++) {
+
+      total += rarest[j];
+
+      out[j] = total;
+
+    }
+
+    return out;
+
+  }
+
+
+
+  function indexedItems(q, digits) {
+
+    if (!searchIndex || q.length < searchIndex.gramSize || /[\s\uD800-\uDFFF]/.test(q)) return null;
+
+    var ids = indexCandidates(searchIndex.grams, searchIndex.common, ngrams(q, searchIndex.gramSize));
+
+    if (!ids) return null;
+
+    if (digits) {
+
+      if (digits.length < searchIndex.phoneGramSize || searchIndex.phoneColumns.indexOf(phoneKey) === -1) return null;
+
+      var phoneIds = indexCandidates(searchIndex.phoneGrams, null, ngrams(digits, searchIndex.phoneGramSize));
+
+      if (!phoneIds) return null;
+
+      ids = ids.concat(phoneIds);
+
+    }
+
+    var seen = Object.create(null);
+
+    var out = [];
+
+    for (var i = 0; i < ids.length; i++) {
+
+      var item = derivedById[ids[i]];
+
+      if (!item || seen[ids[i]]) continue;
+
+      seen[ids[i]] = true;
+
+      out.push(item);
+
+    }
+
+    out.sort(compareDerived);
+
+    return out;
+
+  }
+
+
+
   function applyFilters() {
 
     var q = normalizeText(elSearch.value);
 
+    var digits = q ? phoneQuery(elSearch.value) : "";
+
+    var pool = (q && indexedItems(q, digits)) || derived;
+
     var subject = elSubject.value;
 
     var designation = elDesignation.value;
@@ -3335,13 +3541,13 @@
 
     var out = [];
 
-    for (var i = 0; i < derived.length; i++) {
+    for (var i = 0; i < pool.length; i++) {
 
-      var item = derived[i];
+      var item = pool[i];
 
       var record = item.record;
 
-      if (q && item.search.indexOf(q) === -1) continue;
+      if (q && item.search.indexOf(q) === -1 && !(digits && item.phones.indexOf(digits) !== -1)) continue;
 
       if (subjectKey && subject && normalizeSubjectValue(record[subjectKey]) !== subject) continue;
 
@@ -3403,6 +3609,106 @@
 
 
 
+  function appendRows(rows) {
+
+    for (var i = 0; i < rows.length; i++) {
+
+      data.push(rows[i]);
+
+      var item = deriveRecord(rows[i], data.length - 1);
+
+      derived.push(item);
+
+      derivedById.push(item);
+
+    }
+
+    derived.sort(compareDerived);
+
+    groups = computeGroupsFromRows(data);
+
+    initFilters();
+
+    onUpdate();
+
+  }
+
+
+
+  function loadShards(files) {
+
+    if (!files.length || data !== baseData) return;
+
+    var store = (window.PHONEBOOK_SHARDS = window.PHONEBOOK_SHARDS || {});
+
+    var next = 0;
+
+    function loadNext() {
+
+      if (next >= files.length) return;
+
+      var index = next + 1;
+
+      var script = document.createElement("script");
+
+      script.src = files[next];
+
+      next++;
+
+      script.onload = function () {
+
+        var shard = store[index];
+
+        delete store[index];
+
+        if (shard) appendRows(decodeColumnar(shard));
+
+        loadNext();
+
+      };
+
+      script.onerror = loadNext;
+
+      document.body.appendChild(script);
+
+    }
+
+    loadNext();
+
+  }
+
+
+
+  function loadSearchIndex(name) {
+
+    if (!name || data !== baseData) return;
+
+    var script = document.createElement("script");
+
+    script.src = name;
+
+    script.onload = function () {
+
+      var index = window.PHONEBOOK_INDEX;
+
+      window.PHONEBOOK_INDEX = null;
+
+      if (!index || index.format !== "phonebook-index" || index.count !== meta.count) return;
+
+      index.common = Object.create(null);
+
+      for (var i = 0; i < index.commonGrams.length; i++) index.common[index.commonGrams[i]] = true;
+
+      searchIndex = index;
+
+    };
+
+    document.body.appendChild(script);
+
+  }
+
+
+
   function initTheme() {
 
     var saved = null;
@@ -3733,6 +4039,10 @@
 
     onUpdate();
 
+    loadShards(shardFiles);
+
+    loadSearchIndex(meta && meta.index);
+
   }
 
 
@@ -0,0 +1,2689 @@
+import cProfile
+import csv
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import pstats
+import queue
+import re
+import struct
+import threading
+import time
+import tracemalloc
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from itertools import chain, compress, islice
+from typing import IO, Any, overload
+
+
+SETTINGS_FILE = "phonebook_settings.json"
+SNAPSHOT_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA" if os.name == "nt" else "XDG_CACHE_HOME")
+    or os.path.join(os.path.expanduser("~"), ".cache"),
+    "phonebook",
+)
+SNAPSHOT_MAGIC = b"PBSNAP"
+SNAPSHOT_VERSION = 3
+SNAPSHOT_CACHE_LIMIT = 64 * 1024 * 1024
+DEFAULT_DATA_CANDIDATES = (
+    "teachers.csv",
+    "teacher_phonebook.csv",
+    "teachers_phonebook.csv",
+    "teacher_phone_book.csv",
+    "teachers.xlsx",
+    "teacher_phonebook.xlsx",
+    "phonebook.xlsx",
+    "PhoneBook.xlsx",
+)
+ALL_COLUMNS = "All columns"
+QUERY_HISTORY_SIZE = 16
+INTERN_POOL_LIMIT = 4096
+LOAD_BATCH_SIZE = 500
+PARALLEL_CSV_THRESHOLD = 32 * 1024 * 1024
+PARALLEL_CSV_CHUNK_SIZE = 8 * 1024 * 1024
+CSV_SCAN_BLOCK_SIZE = 1024 * 1024
+CSV_CHUNK_END_MARKER = "\x1e"
+MAPPED_CSV_THRESHOLD = 256 * 1024 * 1024
+MAPPED_CSV_BLOCK_SIZE = 4 * 1024 * 1024
+PHONE_GRAM_SIZE = 4
+PHONE_QUERY_MIN_DIGITS = 3
+PHONE_COLUMN_MIN_RATIO = 0.35
+EMAIL_COLUMN_MIN_RATIO = 0.5
+DEPARTMENT_MAX_DISTINCT_RATIO = 0.2
+PROFILE_BATCH_SIZE = 8 * LOAD_BATCH_SIZE
+PROFILE_SAMPLE_ROWS = 2048
+PROFILE_HLL_PRECISION = 12
+PROFILE_PERCENTILES = (50, 90, 95)
+XLSX_SUFFIXES = (".xlsx", ".xlsm", ".xltx", ".xltm")
+SOURCE_COLUMN = "Source"
+MERGE_SEPARATOR = " / "
+DUPLICATE_MIN_PHONE_DIGITS = 7
+DUPLICATE_WINDOW = 16
+DUPLICATE_NAME_MIN_OVERLAP = 0.5
+NAME_COLUMN_KEYWORDS = ("name", "teacher", "নাম", "শিক্ষক")
+EMAIL_COLUMN_KEYWORDS = ("email", "e-mail", "mail", "ইমেইল", "ই-মেইল")
+DEPARTMENT_COLUMN_KEYWORDS = ("department", "dept", "faculty", "বিভাগ")
+DESIGNATION_COLUMN_KEYWORDS = ("designation", "title", "position", "rank", "পদবি", "পদবী")
+EXPORT_FORMATS = {
+    ".csv": "CSV files",
+    ".jsonl": "JSON Lines",
+    ".vcf": "vCard contacts",
+    ".xlsx": "Excel workbooks",
+}
+NAME_ALIASES = {
+    "md": "mohammad",
+    "mohd": "mohammad",
+    "mohammed": "mohammad",
+    "muhammad": "mohammad",
+    "muhammed": "mohammad",
+    "mst": "mosammat",
+    "mosammath": "mosammat",
+    "মো": "মোহাম্মদ",
+    "মোছা": "মোছাম্মৎ",
+}
+
+
+def load_settings() -> dict[str, Any]:
+    try:
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        return {}
+
+
+def save_settings(data: dict[str, Any]) -> None:
+    try:
+        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+
+def _make_unique_headers(headers: list[str]) -> list[str]:
+    seen: dict[str, int] = {}
+    out: list[str] = []
+    for header in headers:
+        base = header.strip() or "Column"
+        if base not in seen:
+            seen[base] = 1
+            out.append(base)
+            continue
+        seen[base] += 1
+        out.append(f"{base} ({seen[base]})")
+    return out
+
+
+def _is_row_empty(values: Iterable[str | None]) -> bool:
+    return all(not (value or "").strip() for value in values)
+
+
+class RowView(Mapping[str, str]):
+    __slots__ = ("table", "row_id")
+
+    def __init__(self, table: "RecordTable", row_id: int) -> None:
+        self.table = table
+        self.row_id = row_id
+
+    def __getitem__(self, column: str) -> str:
+        return self.table.cell(self.row_id, self.table.positions[column])
+
+    def get(self, column: str, default: Any = None) -> Any:
+        pos = self.table.positions.get(column)
+        if pos is None:
+            return default
+        return self.table.cell(self.row_id, pos)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.columns)
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+
+class RecordView(Sequence[RowView]):
+    __slots__ = ("table", "row_ids")
+
+    def __init__(self, table: "RecordTable", row_ids: Sequence[int]) -> None:
+        self.table = table
+        self.row_ids = row_ids
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @overload
+    def __getitem__(self, idx: int) -> RowView: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> "RecordView": ...
+
+    def __getitem__(self, idx: int | slice) -> "RowView | RecordView":
+        if isinstance(idx, slice):
+            return RecordView(self.table, self.row_ids[idx])
+        return RowView(self.table, self.row_ids[idx])
+
+    def row_values(self, idx: int) -> list[str]:
+        return self.table.row_values(self.row_ids[idx])
+
+
+class RecordTable(Sequence[RowView]):
+    def __init__(self, columns: list[str]) -> None:
+        self.columns = list(columns)
+        self.positions = {col: pos for pos, col in enumerate(self.columns)}
+        self.data: list[list[str]] = [[] for _ in self.columns]
+        self._pools: list[dict[str, str] | None] = [{} for _ in self.columns]
+        self._length = 0
+        self.profile: TableProfile | None = None
+
+    def append(self, values: Sequence[str]) -> None:
+        width = len(values)
+        for pos, column_values in enumerate(self.data):
+            value = values[pos] if pos < width else ""
+            pool = self._pools[pos]
+            if pool is not None:
+                value = pool.setdefault(value, value)
+                if len(pool) > INTERN_POOL_LIMIT:
+                    self._pools[pos] = None
+            column_values.append(value)
+        self._length += 1
+
+    def extend_columns(self, data: list[list[str]]) -> None:
+        for pos, values in enumerate(data):
+            pool = self._pools[pos]
+            column_values = self.data[pos]
+            for value in values:
+                if pool is not None:
+                    value = pool.setdefault(value, value)
+                    if len(pool) > INTERN_POOL_LIMIT:
+                        pool = None
+                column_values.append(value)
+            self._pools[pos] = pool
+        self._length += len(data[0]) if data else 0
+
+    @classmethod
+    def from_columns(cls, columns: list[str], data: list[list[str]]) -> "RecordTable":
+        table = cls(columns)
+        table.extend_columns(data)
+        return table
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, idx: int) -> RowView: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> RecordView: ...
+
+    def __getitem__(self, idx: int | slice) -> RowView | RecordView:
+        if isinstance(idx, slice):
+            return RecordView(self, range(self._length)[idx])
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError("row index out of range")
+        return RowView(self, idx)
+
+    def column(self, column: str) -> list[str]:
+        return self.data[self.positions[column]]
+
+    def row_values(self, row_id: int) -> list[str]:
+        return [column_values[row_id] for column_values in self.data]
+
+    def cell(self, row_id: int, pos: int) -> str:
+        return self.data[pos][row_id]
+
+    def view(self, row_ids: Sequence[int] | None = None) -> RecordView:
+        return RecordView(self, range(self._length) if row_ids is None else row_ids)
+
+
+BatchCallback = Callable[[RecordTable, int], None]
+ExportProgress = Callable[[int, int], None]
+
+# Same test as _is_phone_like() (7-15 digits, no "@"), as one regex for the profiler's inner loop.
+_PHONE_LIKE_VALUE = re.compile(r"[^@\d]*+(?:\d[^@\d]*+){7,15}")
+_NUMERIC_VALUE = re.compile(r"[+-]?(?:\d[\d,]*(?:\.\d+)?|\.\d+)")
+_AT_SIGN = re.compile("@")
+_EMAIL_VALUE = re.compile(r"[^@\s]++@[^@\s]+\.[^@\s]+")
+
+
+@dataclass
+class ColumnStats:
+    filled: int
+    phone_ratio: float
+    email_ratio: float
+    numeric_ratio: float
+    distinct: int
+    max_length: int
+    length_percentiles: dict[int, int]
+    longest: str
+
+
+class ColumnProfiler:
+    def __init__(self) -> None:
+        self.filled = 0
+        self.phone = 0
+        self.email = 0
+        self.numeric = 0
+        self.lengths: Counter[int] = Counter()
+        self.longest = ""
+        self.exact: set[str] | None = set()
+        self.registers = bytearray(1 << PROFILE_HLL_PRECISION)
+
+    def add(self, values: Sequence[str]) -> None:
+        # Repeated values (departments, designations) are classified once per batch, and the
+        # per-value checks run through map/filter so that only the HyperLogLog update is a Python loop.
+        counts = Counter(values)
+        counts.pop("", None)
+        weight = counts.__getitem__
+        self.filled += sum(counts.values())
+        self.phone += sum(map(weight, filter(_PHONE_LIKE_VALUE.fullmatch, counts)))
+        self.email += sum(map(weight, filter(_EMAIL_VALUE.fullmatch, filter(_AT_SIGN.search, counts))))
+        self.numeric += sum(map(weight, filter(_NUMERIC_VALUE.fullmatch, counts)))
+        self.lengths.update(map(len, values))
+        self.lengths.pop(0, None)
+        longest = max(counts, key=len, default="")
+        if len(longest) > len(self.longest):
+            self.longest = longest
+        if self.exact is not None:
+            self.exact.update(counts)
+            if len(self.exact) > INTERN_POOL_LIMIT:
+                self.exact = None
+
+        registers = self.registers
+        mask = (1 << PROFILE_HLL_PRECISION) - 1
+        width = 64 - PROFILE_HLL_PRECISION
+        for hashed in map(hash, counts):
+            hashed &= 0xFFFFFFFFFFFFFFFF
+            rank = width - (hashed >> PROFILE_HLL_PRECISION).bit_length() + 1
+            if rank > registers[hashed & mask]:
+                registers[hashed & mask] = rank
+
+    def distinct(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        # HyperLogLog estimate with the small-range (linear counting) correction.
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0**-rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return min(round(estimate), self.filled)
+
+    def stats(self) -> ColumnStats:
+        filled = self.filled or 1
+        percentiles: dict[int, int] = {}
+        seen = 0
+        pending = list(PROFILE_PERCENTILES)
+        for length in sorted(self.lengths):
+            seen += self.lengths[length]
+            while pending and seen * 100 >= pending[0] * self.filled:
+                percentiles[pending.pop(0)] = length
+        for percentile in pending:
+            percentiles[percentile] = 0
+        return ColumnStats(
+            filled=self.filled,
+            phone_ratio=self.phone / filled,
+            email_ratio=self.email / filled,
+            numeric_ratio=self.numeric / filled,
+            distinct=self.distinct(),
+            max_length=max(self.lengths, default=0),
+            length_percentiles=percentiles,
+            longest=self.longest,
+        )
+
+
+@dataclass
+class TableProfile:
+    rows: int
+    sampled: int
+    columns: dict[str, ColumnStats]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "sampled": self.sampled,
+            "columns": {
+                column: dict(vars(stats), length_percentiles={str(k): v for k, v in stats.length_percentiles.items()})
+                for column, stats in self.columns.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TableProfile":
+        columns = {}
+        for column, stats in data["columns"].items():
+            percentiles = {int(k): v for k, v in stats["length_percentiles"].items()}
+            columns[column] = ColumnStats(**dict(stats, length_percentiles=percentiles))
+        return cls(rows=data["rows"], sampled=data["sampled"], columns=columns)
+
+
+class TableProfiler:
+    # Profiles every row of small tables and a thinning sample of large ones: the stride doubles
+    # each time the row count does, so a million rows cost about ten times PROFILE_SAMPLE_ROWS values
+    # per column and the parse loop stays close to its unprofiled speed. Column stats are therefore
+    # over `sampled` rows, not `rows`.
+    def __init__(self, table: RecordTable) -> None:
+        self.table = table
+        self.profilers = [ColumnProfiler() for _ in table.columns]
+        self.done = 0
+        self.next_row = 0
+        self.sampled = 0
+
+    def update(self) -> None:
+        end = len(self.table)
+        if end == self.done:
+            return
+        stride = 1 << max(0, (end // PROFILE_SAMPLE_ROWS).bit_length() - 1)
+        sample = range(self.next_row, end, stride)
+        if sample:
+            for profiler, values in zip(self.profilers, self.table.data):
+                profiler.add(values[sample.start : end : stride])
+            self.sampled += len(sample)
+            self.next_row = sample[-1] + stride
+        self.done = end
+
+    def finish(self) -> TableProfile:
+        self.update()
+        profile = TableProfile(
+            rows=self.done,
+            sampled=self.sampled,
+            columns={column: profiler.stats() for column, profiler in zip(self.table.columns, self.profilers)},
+        )
+        self.table.profile = profile
+        return profile
+
+
+def profile_table(table: RecordTable) -> TableProfile:
+    return TableProfiler(table).finish()
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+@dataclass
+class Phase:
+    name: str
+    seconds: float
+    allocated: int | None = None
+
+
+def format_duration(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    return f"{seconds * 1000:.0f} ms"
+
+
+class PhaseTimer:
+    def __init__(self, operation: str, track_memory: bool = False) -> None:
+        self.operation = operation
+        self.track_memory = track_memory
+        self.started = time.time()
+        self.phases: list[Phase] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # tracemalloc is process-wide, so allocations of phases running at the same time in other threads are counted too.
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            allocated = tracemalloc.get_traced_memory()[1] - baseline if tracing else None
+            self.phases.append(Phase(name, elapsed, allocated))
+
+    @property
+    def total(self) -> float:
+        return sum(phase.seconds for phase in self.phases)
+
+    def summary(self) -> str:
+        totals: dict[str, float] = {}
+        for phase in self.phases:
+            totals[phase.name] = totals.get(phase.name, 0.0) + phase.seconds
+        return ", ".join(f"{name} {format_duration(seconds)}" for name, seconds in totals.items())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "started": self.started,
+            "seconds": round(self.total, 6),
+            "phases": [
+                {"name": phase.name, "seconds": round(phase.seconds, 6), "allocated_bytes": phase.allocated}
+                for phase in self.phases
+            ],
+        }
+
+
+def timed(timer: PhaseTimer | None, name: str) -> AbstractContextManager[None]:
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+class ProfileSession:
+    def __init__(self, path: str, track_memory: bool = False) -> None:
+        self.path = path
+        self.track_memory = track_memory
+        self.timers: list[PhaseTimer] = []
+        self._profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def timer(self, operation: str) -> PhaseTimer:
+        timer = PhaseTimer(operation, self.track_memory)
+        with self._lock:
+            self.timers.append(timer)
+        return timer
+
+    @contextmanager
+    def profiled(self) -> Iterator[None]:
+        # Before Python 3.12 cProfile only sees the thread that enabled it, so every worker thread keeps its
+        # own profile. From 3.12 it hooks sys.monitoring, which covers all threads but allows one profiler:
+        # a worker's enable() then fails, and the main thread's profile already records the worker.
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            yield
+            return
+        with self._lock:
+            self._profiles.append(profile)
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def start(self) -> None:
+        if self.track_memory:
+            tracemalloc.start()
+
+    def write(self) -> tuple[str, str]:
+        stats_path = f"{self.path}.prof"
+        trace_path = f"{self.path}.json"
+        with self._lock:
+            profiles = list(self._profiles)
+            timers = [timer.as_dict() for timer in self.timers]
+        stats = pstats.Stats(*profiles) if profiles else None
+        if stats is not None:
+            stats.dump_stats(stats_path)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"track_memory": self.track_memory, "operations": timers}, f, ensure_ascii=False, indent=2)
+        return stats_path, trace_path
+
+
+def _table_from_rows(
+    rows: Iterable[list[str]],
+    missing_header_message: str,
+    on_batch: BatchCallback | None = None,
+    tell: Callable[[], int] | None = None,
+) -> tuple[list[str], RecordTable]:
+    row_iter = iter(rows)
+    first_row = next(row_iter, None)
+    if not first_row:
+        raise ValueError(missing_header_message)
+
+    headers = _make_unique_headers([h.strip() for h in first_row])
+    table = RecordTable(headers)
+    profiler = TableProfiler(table)
+    _append_rows(table, row_iter, on_batch, tell, profiler)
+    profiler.finish()
+    return headers, table
+
+
+def _append_rows(
+    table: RecordTable,
+    rows: Iterable[list[str]],
+    on_batch: BatchCallback | None = None,
+    tell: Callable[[], int] | None = None,
+    profiler: TableProfiler | None = None,
+) -> None:
+    width = len(table.columns)
+    for row in rows:
+        values = [value.strip() for value in row[:width]]
+        if _is_row_empty(values):
+            continue
+        table.append(values)
+        # Profiling each batch while its values are still in cache keeps it to a single pass over the file.
+        if profiler is not None and len(table) % PROFILE_BATCH_SIZE == 0:
+            profiler.update()
+        if on_batch is not None and len(table) % LOAD_BATCH_SIZE == 0:
+            on_batch(table, tell() if tell else 0)
+    if profiler is not None:
+        profiler.update()
+    if on_batch is not None:
+        on_batch(table, tell() if tell else 0)
+
+
+def _sniff_csv_dialect(f: io.TextIOWrapper) -> type[csv.Dialect]:
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", "|"])
+    except Exception:
+        return csv.excel
+
+
+def read_csv_records(
+    path: str, on_batch: BatchCallback | None = None, timer: PhaseTimer | None = None
+) -> tuple[list[str], RecordTable]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        with timed(timer, "sniff"):
+            dialect = _sniff_csv_dialect(f)
+        with timed(timer, "parse"):
+            if _can_parse_in_parallel(f, dialect):
+                return _read_csv_parallel(path, _dialect_options(dialect), on_batch)
+            return _table_from_rows(
+                csv.reader(f, dialect=dialect), "CSV file has no header row.", on_batch, f.buffer.tell
+            )
+
+
+def _can_parse_in_parallel(f: io.TextIOWrapper, dialect: type[csv.Dialect]) -> bool:
+    # Quote parity only marks record boundaries when quotes are escaped by doubling them.
+    return (
+        (os.cpu_count() or 1) > 1
+        and os.fstat(f.fileno()).st_size >= PARALLEL_CSV_THRESHOLD
+        and dialect.quoting != csv.QUOTE_NONE
+        and bool(dialect.doublequote)
+        and not dialect.escapechar
+        and bool(dialect.quotechar)
+    )
+
+
+def _dialect_options(dialect: type[csv.Dialect]) -> dict[str, Any]:
+    return {
+        "delimiter": dialect.delimiter,
+        "quotechar": dialect.quotechar,
+        "doublequote": dialect.doublequote,
+        "skipinitialspace": dialect.skipinitialspace,
+        "quoting": dialect.quoting,
+    }
+
+
+def _read_csv_record_bytes(f: io.BufferedReader, quote: bytes) -> bytes:
+    record = b""
+    while True:
+        line = f.readline()
+        record += line
+        if not line or record.count(quote) % 2 == 0:
+            return record
+
+
+def _csv_chunk_bounds(path: str, start: int, quote: bytes, chunk_size: int) -> list[tuple[int, int]]:
+    # A newline ends a record only when an even number of quote characters precede it in the chunk.
+    bounds: list[tuple[int, int]] = []
+    chunk_start = start
+    quotes = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while True:
+            block = f.read(CSV_SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            offset = 0
+            target = chunk_start + chunk_size - pos
+            while target < len(block):
+                search_from = max(offset, target)
+                quotes += block.count(quote, offset, search_from)
+                offset = search_from
+                newline = block.find(b"\n", offset)
+                while newline >= 0:
+                    quotes += block.count(quote, offset, newline)
+                    offset = newline + 1
+                    if quotes % 2 == 0:
+                        break
+                    newline = block.find(b"\n", offset)
+                if newline < 0:
+                    break
+                bounds.append((chunk_start, pos + offset))
+                chunk_start = pos + offset
+                quotes = 0
+                target = chunk_start + chunk_size - pos
+            quotes += block.count(quote, offset)
+            pos += len(block)
+    if chunk_start < pos:
+        bounds.append((chunk_start, pos))
+    return bounds
+
+
+def _parse_csv_chunk(
+    path: str, start: int, end: int, width: int, options: dict[str, Any]
+) -> tuple[list[list[str]], bool]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    if text and not text.endswith(("\n", "\r")):
+        text += "\n"
+
+    # A stray quote in an unquoted field can fool the boundary scan into splitting inside a
+    # quoted field; the end marker then gets swallowed by that field and the chunk reports it.
+    rows = list(csv.reader(io.StringIO(text + CSV_CHUNK_END_MARKER, newline=""), **options))
+    complete = bool(rows) and rows.pop() == [CSV_CHUNK_END_MARKER]
+
+    # Interning here lets pickle send each repeated value once instead of once per row.
+    table = RecordTable([str(pos) for pos in range(width)])
+    _append_rows(table, rows)
+    return table.data, complete
+
+
+def _read_csv_parallel(
+    path: str, options: dict[str, Any], on_batch: BatchCallback | None = None
+) -> tuple[list[str], RecordTable]:
+    quote = options["quotechar"].encode("utf-8")
+    with open(path, "rb") as f:
+        header = _read_csv_record_bytes(f, quote)
+        data_start = f.tell()
+
+    first_row = next(csv.reader(io.StringIO(header.decode("utf-8-sig"), newline=""), **options), None)
+    if not first_row:
+        raise ValueError("CSV file has no header row.")
+    headers = _make_unique_headers([h.strip() for h in first_row])
+    table = RecordTable(headers)
+    profiler = TableProfiler(table)
+
+    bounds = _csv_chunk_bounds(path, data_start, quote, PARALLEL_CSV_CHUNK_SIZE)
+    workers = min(os.cpu_count() or 1, len(bounds)) or 1
+    # Spawned workers only import this module, which keeps them safe to start from the GUI's loader thread.
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [
+            executor.submit(_parse_csv_chunk, path, start, end, len(headers), options) for start, end in bounds
+        ]
+        for future, (start, end) in zip(futures, bounds):
+            columns, complete = future.result()
+            if not complete:
+                _append_csv_tail(path, start, options, table, on_batch, profiler)
+                break
+            table.extend_columns(columns)
+            profiler.update()
+            if on_batch is not None:
+                on_batch(table, end)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if on_batch is not None and not bounds:
+        on_batch(table, data_start)
+    profiler.finish()
+    return headers, table
+
+
+def _append_csv_tail(
+    path: str,
+    start: int,
+    options: dict[str, Any],
+    table: RecordTable,
+    on_batch: BatchCallback | None,
+    profiler: TableProfiler | None = None,
+) -> None:
+    with open(path, "rb") as raw:
+        raw.seek(start)
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            _append_rows(table, csv.reader(f, **options), on_batch, raw.tell, profiler)
+
+
+class MappedCsvTable(RecordTable):
+    def __init__(self, columns: list[str], buffer: mmap.mmap, options: dict[str, Any]) -> None:
+        super().__init__(columns)
+        self.buffer = buffer
+        self.options = options
+        self.offsets = array("Q")
+        self.end = 0
+        self.quote = (options["quotechar"] or '"').encode("utf-8")
+        self._last_row: tuple[int, list[str]] = (-1, [])
+
+    def row_values(self, row_id: int) -> list[str]:
+        last_id, last_values = self._last_row
+        if last_id == row_id:
+            return list(last_values)
+        offsets = self.offsets
+        start = offsets[row_id]
+        end = offsets[row_id + 1] if row_id + 1 < len(offsets) else self.end
+        raw = self.buffer[start:end]
+        if self.quote not in raw:
+            newline = raw.find(b"\n")
+            line = raw[:newline] if newline >= 0 else raw
+            row = line.decode("utf-8", "replace").split(self.options["delimiter"])
+        else:
+            text = raw.decode("utf-8", "replace")
+            row = next(csv.reader(io.StringIO(text, newline=""), **self.options), [])
+        width = len(self.columns)
+        values = [value.strip() for value in row[:width]]
+        values.extend([""] * (width - len(values)))
+        self._last_row = (row_id, values)
+        return list(values)
+
+    def cell(self, row_id: int, pos: int) -> str:
+        return self.row_values(row_id)[pos]
+
+    def column(self, column: str) -> list[str]:
+        pos = self.positions[column]
+        return [self.row_values(row_id)[pos] for row_id in range(self._length)]
+
+    def iter_rows(self) -> Iterator[list[str]]:
+        return (self.row_values(row_id) for row_id in range(self._length))
+
+
+def _csv_record_is_open(raw: bytes, options: dict[str, Any]) -> bool:
+    text = raw.decode("utf-8", "replace") + "\n" + CSV_CHUNK_END_MARKER
+    rows = list(csv.reader(io.StringIO(text, newline=""), **options))
+    return rows[-1] != [CSV_CHUNK_END_MARKER]
+
+
+def should_map_csv(path: str) -> bool:
+    try:
+        return not path.lower().endswith(XLSX_SUFFIXES) and (
+            os.path.getsize(path) >= MAPPED_CSV_THRESHOLD
+        )
+    except OSError:
+        return False
+
+
+def read_csv_mapped(path: str, on_batch: BatchCallback | None = None) -> tuple[list[str], MappedCsvTable]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        options = _dialect_options(_sniff_csv_dialect(f))
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("CSV file has no header row.") from None
+
+    quote = (options["quotechar"] or '"').encode("utf-8")
+    blank = b" \t\r\n" + quote + options["delimiter"].encode("utf-8")
+    size = len(buffer)
+
+    # The header is the first record; it may span lines if a quoted header contains a newline.
+    header_end = 0
+    quotes = 0
+    while header_end < size:
+        newline = buffer.find(b"\n", header_end)
+        line_end = size if newline < 0 else newline + 1
+        quotes += buffer[header_end:line_end].count(quote)
+        header_end = line_end
+        if quotes % 2 == 0:
+            break
+    header = buffer[:header_end].decode("utf-8-sig")
+    first_row = next(csv.reader(io.StringIO(header, newline=""), **options), None)
+    if not first_row:
+        raise ValueError("CSV file has no header row.")
+    headers = _make_unique_headers([h.strip() for h in first_row])
+    table = MappedCsvTable(headers, buffer, options)
+
+    # One pass records where each non-empty record starts; fields are decoded only when a row is read.
+    # Quotes that neither open nor close a field make quote parity unreliable for that line.
+    fence = re.escape(quote) + re.escape(options["delimiter"].encode("utf-8"))
+    stray_quote = re.compile(b"[^" + fence + b"]" + re.escape(quote) + b"[^" + fence + b"\r]")
+    offsets = table.offsets
+    pos = header_end
+    open_record: int | None = None
+    while pos < size:
+        newline = buffer.find(b"\n", min(size, pos + MAPPED_CSV_BLOCK_SIZE))
+        block_end = size if newline < 0 else newline + 1
+        block = buffer[pos:block_end]
+        has_quotes = quote in block
+        line_start = pos
+        for line in block.split(b"\n"):
+            start = line_start
+            line_start += len(line) + 1
+            if open_record is not None:
+                if not _csv_record_is_open(buffer[open_record : start + len(line)], options):
+                    open_record = None
+                continue
+            if (
+                has_quotes
+                and (line.count(quote) % 2 or stray_quote.search(line))
+                and _csv_record_is_open(line, options)
+            ):
+                open_record = start
+                offsets.append(start)
+            elif line.strip(blank):
+                offsets.append(start)
+        pos = block_end
+        table.end = block_end
+        table._length = len(offsets)
+        if on_batch is not None:
+            on_batch(table, block_end)
+    if on_batch is not None and not offsets:
+        on_batch(table, size)
+    return headers, table
+
+
+def _has_values(values: Iterable[Any]) -> bool:
+    return any(v is not None and str(v).strip() for v in values)
+
+
+def _open_workbook(path: str) -> Any:
+    try:
+        import openpyxl  # type: ignore
+    except Exception as e:
+        raise RuntimeError("Reading .xlsx requires the 'openpyxl' package.") from e
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def read_xlsx_records(
+    path: str, on_batch: BatchCallback | None = None, sheet: str | None = None, timer: PhaseTimer | None = None
+) -> tuple[list[str], RecordTable]:
+    with timed(timer, "open workbook"):
+        wb = _open_workbook(path)
+    try:
+        with timed(timer, "read sheet"):
+            return _read_worksheet(wb[sheet or wb.sheetnames[0]], os.path.getsize(path), on_batch)
+    finally:
+        wb.close()
+
+
+def read_xlsx_sheets(path: str) -> list[tuple[str, list[str], RecordTable]]:
+    wb = _open_workbook(path)
+    try:
+        file_size = os.path.getsize(path)
+        sheets = []
+        for name in wb.sheetnames:
+            try:
+                headers, table = _read_worksheet(wb[name], file_size)
+            except ValueError:
+                continue
+            sheets.append((name, headers, table))
+        return sheets
+    finally:
+        wb.close()
+
+
+def _read_worksheet(ws: Any, file_size: int, on_batch: BatchCallback | None = None) -> tuple[list[str], RecordTable]:
+    # Read-only sheets trust the stored dimension, and some exporters write "A1:A1" for any sheet,
+    # which would cut every row to one column. Read the cells that are actually there instead.
+    ws.reset_dimensions()
+    rows = ws.iter_rows(values_only=True)
+    head = list(islice(rows, 20))
+
+    first_cell = head[0][0] if head and head[0] else None
+    looks_like_csv_in_one_column = (
+        isinstance(first_cell, str)
+        and any(sep in first_cell for sep in (",", ";", "\t", "|"))
+        and all(not _has_values(row[1:]) for row in head)
+    )
+
+    if looks_like_csv_in_one_column:
+        lines: list[str] = []
+        for row in chain(head, rows):
+            value = row[0] if row else None
+            if value is None:
+                continue
+            text = str(value).strip()
+            if text:
+                lines.append(text)
+        if not lines:
+            raise ValueError("Excel file is empty.")
+
+        sample = "\n".join(lines[:30])
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", "|"])
+        except Exception:
+            dialect = csv.excel
+
+        return _table_from_rows(
+            csv.reader(lines, dialect=dialect), "Excel file has no header row.", on_batch, lambda: file_size
+        )
+
+    headers_row = None
+    for idx, values in enumerate(head):
+        if _has_values(values):
+            headers_row = idx
+            break
+
+    if headers_row is None:
+        raise ValueError("Excel file is empty.")
+
+    raw_headers = ["" if v is None else str(v).strip() for v in head[headers_row]]
+    if not any(raw_headers):
+        raise ValueError("Excel header row is empty.")
+
+    headers = _make_unique_headers(raw_headers)
+    width = len(headers)
+
+    table = RecordTable(headers)
+    profiler = TableProfiler(table)
+    for cells in chain(head[headers_row + 1 :], rows):
+        values = ["" if value is None else str(value).strip() for value in cells[:width]]
+        if _is_row_empty(values):
+            continue
+        table.append(values)
+        if len(table) % PROFILE_BATCH_SIZE == 0:
+            profiler.update()
+        if on_batch is not None and len(table) % LOAD_BATCH_SIZE == 0:
+            on_batch(table, file_size)
+    profiler.finish()
+    if on_batch is not None:
+        on_batch(table, file_size)
+
+    return headers, table
+
+
+def read_tabular_records(
+    path: str, on_batch: BatchCallback | None = None, timer: PhaseTimer | None = None
+) -> tuple[list[str], RecordTable]:
+    lower = path.lower()
+    if lower.endswith(XLSX_SUFFIXES):
+        return read_xlsx_records(path, on_batch, timer=timer)
+    return read_csv_records(path, on_batch, timer)
+
+
+def read_merged_records(paths: Sequence[str]) -> tuple[list[str], RecordTable]:
+    sources: list[tuple[str, list[str], RecordTable]] = []
+    for path in paths:
+        name = os.path.basename(path)
+        if path.lower().endswith(XLSX_SUFFIXES):
+            sheets = read_xlsx_sheets(path)
+            if not sheets:
+                raise ValueError(f"{name} has no data.")
+            for sheet, headers, table in sheets:
+                sources.append((f"{name} [{sheet}]" if len(sheets) > 1 else name, headers, table))
+        else:
+            headers, table = read_csv_records(path)
+            sources.append((name, headers, table))
+
+    # Headers that differ only in case or surrounding spaces are the same column.
+    columns: list[str] = []
+    positions: dict[str, int] = {}
+    mappings: list[list[int]] = []
+    for _label, headers, _table in sources:
+        mapping = []
+        for header in headers:
+            key = header.strip().casefold()
+            if key not in positions:
+                positions[key] = len(columns)
+                columns.append(header.strip())
+            mapping.append(positions[key])
+        mappings.append(mapping)
+
+    width = len(columns)
+    columns = _make_unique_headers([*columns, SOURCE_COLUMN])
+    merged = RecordTable(columns)
+    for (label, _headers, table), mapping in zip(sources, mappings):
+        for row_id in range(len(table)):
+            values = [""] * (width + 1)
+            for pos, value in zip(mapping, table.row_values(row_id)):
+                if value:
+                    values[pos] = value
+            values[width] = label
+            merged.append(values)
+    profile_table(merged)
+    return columns, merged
+
+
+def _exported_rows(records: RecordView, on_progress: ExportProgress | None = None) -> Iterator[list[str]]:
+    total = len(records)
+    for idx in range(total):
+        if on_progress is not None and idx % LOAD_BATCH_SIZE == 0:
+            on_progress(idx, total)
+        yield records.row_values(idx)
+    if on_progress is not None:
+        on_progress(total, total)
+
+
+def write_csv(
+    f: IO[str], columns: list[str], records: RecordView, on_progress: ExportProgress | None = None, **options: Any
+) -> None:
+    writer = csv.writer(f, **options)
+    writer.writerow(columns)
+    writer.writerows(_exported_rows(records, on_progress))
+
+
+def write_jsonl(f: IO[str], columns: list[str], records: RecordView, on_progress: ExportProgress | None = None) -> None:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    keys = [encode(col) + ":" for col in columns]
+    for values in _exported_rows(records, on_progress):
+        f.write("{" + ",".join(key + encode(value) for key, value in zip(keys, values)) + "}\n")
+
+
+def email_column(table: RecordTable) -> int | None:
+    pos = _keyword_column(table.columns, EMAIL_COLUMN_KEYWORDS)
+    if pos is not None or table.profile is None:
+        return pos
+    ratio, column = max(((stats.email_ratio, column) for column, stats in table.profile.columns.items()), default=(0, ""))
+    return table.positions[column] if ratio >= EMAIL_COLUMN_MIN_RATIO else None
+
+
+def department_column(table: RecordTable) -> int | None:
+    pos = _keyword_column(table.columns, DEPARTMENT_COLUMN_KEYWORDS)
+    if pos is not None or table.profile is None:
+        return pos
+    # Without a header hint, a department is a mostly filled text column with few distinct values.
+    # Designations repeat too, but there are fewer of them than departments.
+    excluded = set(name_like_columns(table.columns))
+    excluded.update(col for col in table.columns if any(k in col.casefold() for k in DESIGNATION_COLUMN_KEYWORDS))
+    best: tuple[int, str] | None = None
+    for column, stats in table.profile.columns.items():
+        if column in excluded or stats.filled * 2 < table.profile.sampled:
+            continue
+        if stats.phone_ratio > 0.1 or stats.email_ratio > 0.1 or stats.numeric_ratio > 0.1:
+            continue
+        if stats.distinct > DEPARTMENT_MAX_DISTINCT_RATIO * stats.filled or stats.distinct < 2:
+            continue
+        if best is None or stats.distinct > best[0]:
+            best = (stats.distinct, column)
+    return table.positions[best[1]] if best else None
+
+
+def _keyword_column(columns: list[str], keywords: Iterable[str]) -> int | None:
+    for pos, col in enumerate(columns):
+        key = col.strip().casefold()
+        if any(token in key for token in keywords):
+            return pos
+    return None
+
+
+def _vcard_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _vcard_line(name: str, value: str) -> str:
+    # RFC 2425 folds lines longer than 75 octets; continuation lines start with a space.
+    line = f"{name}:{value}"
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts: list[str] = []
+    current = ""
+    size = 0
+    for ch in line:
+        width = len(ch.encode("utf-8"))
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = "", 0
+        current += ch
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def write_vcards(
+    f: IO[str],
+    columns: list[str],
+    records: RecordView,
+    phone_column: str | None = None,
+    on_progress: ExportProgress | None = None,
+) -> None:
+    names = name_like_columns(columns)
+    name_pos = columns.index(names[0]) if names else None
+    phone_positions = [records.table.positions[col] for col in phone_like_columns(records.table, phone_column)]
+    email_pos = email_column(records.table)
+    org_pos = department_column(records.table)
+    title_pos = _keyword_column(columns, DESIGNATION_COLUMN_KEYWORDS)
+
+    for values in _exported_rows(records, on_progress):
+        name = values[name_pos] if name_pos is not None else ""
+        phones = [phone for pos in phone_positions for phone in values[pos].split(MERGE_SEPARATOR) if phone]
+        if not name and not phones:
+            continue
+        lines = ["BEGIN:VCARD\r\n", "VERSION:3.0\r\n"]
+        full_name = _vcard_escape(name or phones[0])
+        lines.append(_vcard_line("FN", full_name))
+        lines.append(_vcard_line("N", f"{full_name};;;;"))
+        for phone in phones:
+            lines.append(_vcard_line("TEL;TYPE=CELL", _vcard_escape(phone)))
+        if email_pos is not None:
+            for email in values[email_pos].split(MERGE_SEPARATOR):
+                if email:
+                    lines.append(_vcard_line("EMAIL;TYPE=INTERNET", _vcard_escape(email)))
+        if org_pos is not None and values[org_pos]:
+            lines.append(_vcard_line("ORG", _vcard_escape(values[org_pos])))
+        if title_pos is not None and values[title_pos]:
+            lines.append(_vcard_line("TITLE", _vcard_escape(values[title_pos])))
+        lines.append("END:VCARD\r\n")
+        f.write("".join(lines))
+
+
+def write_xlsx(path: str, columns: list[str], records: RecordView, on_progress: ExportProgress | None = None) -> None:
+    try:
+        import openpyxl  # type: ignore
+    except Exception as e:
+        raise RuntimeError("Writing .xlsx requires the 'openpyxl' package.") from e
+    from openpyxl.cell import WriteOnlyCell  # type: ignore
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Teachers")
+
+    def text_cells(values: Sequence[str]) -> list[Any]:
+        # openpyxl stores any string starting with "=" as a formula; keep such values as the text they were.
+        cells: list[Any] = list(values)
+        for pos, value in enumerate(values):
+            if value.startswith("="):
+                cell = WriteOnlyCell(ws, value)
+                cell.data_type = "s"
+                cells[pos] = cell
+        return cells
+
+    ws.append(text_cells(columns))
+    for values in _exported_rows(records, on_progress):
+        ws.append(text_cells(values))
+    wb.save(path)
+
+
+def export_records(
+    path: str,
+    columns: list[str],
+    records: RecordView,
+    phone_column: str | None = None,
+    on_progress: ExportProgress | None = None,
+) -> None:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        ext = ".csv"
+    tmp_path = f"{path}.tmp"
+    try:
+        if ext == ".xlsx":
+            write_xlsx(tmp_path, columns, records, on_progress)
+        else:
+            encoding = "utf-8-sig" if ext == ".csv" else "utf-8"
+            with open(tmp_path, "w", encoding=encoding, newline="") as f:
+                if ext == ".jsonl":
+                    write_jsonl(f, columns, records, on_progress)
+                elif ext == ".vcf":
+                    write_vcards(f, columns, records, phone_column, on_progress)
+                else:
+                    write_csv(f, columns, records, on_progress)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def export_csv(path: str, columns: list[str], records: RecordView) -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        write_csv(f, columns, records)
+
+
+def _snapshot_path(path: str) -> str:
+    name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(SNAPSHOT_DIR, f"{name}.snap")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_key(path: str) -> dict[str, Any]:
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def load_snapshot(path: str) -> tuple[list[str], RecordTable, str | None] | None:
+    snap_path = _snapshot_path(path)
+    try:
+        with open(snap_path, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+
+    try:
+        if not blob.startswith(SNAPSHOT_MAGIC):
+            raise ValueError("bad magic")
+        offset = len(SNAPSHOT_MAGIC)
+        version, meta_len = struct.unpack_from(">HI", blob, offset)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("old version")
+        offset += struct.calcsize(">HI")
+        meta = json.loads(blob[offset : offset + meta_len].decode("utf-8"))
+
+        # The stat fields find the entry; the digest only has to confirm a hit.
+        key = snapshot_key(path)
+        if any(meta[name] != value for name, value in key.items()) or meta["sha256"] != _file_digest(path):
+            return None
+
+        data = json.loads(zlib.decompress(blob[offset + meta_len :]).decode("utf-8"))
+        headers = meta["headers"]
+        if len(data) != len(headers) or any(len(values) != meta["rows"] for values in data):
+            raise ValueError("truncated snapshot")
+    except Exception:
+        try:
+            os.remove(snap_path)
+        except OSError:
+            pass
+        return None
+
+    try:
+        os.utime(snap_path)
+    except OSError:
+        pass
+    table = RecordTable.from_columns(headers, data)
+    if meta.get("profile"):
+        table.profile = TableProfile.from_dict(meta["profile"])
+    return headers, table, meta.get("phone_column")
+
+
+def save_snapshot(key: dict[str, Any], headers: list[str], table: RecordTable, phone_column: str | None) -> None:
+    payload = zlib.compress(json.dumps(table.data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+    if len(payload) > SNAPSHOT_CACHE_LIMIT:
+        return
+    snap_path = _snapshot_path(key["path"])
+    try:
+        digest = _file_digest(key["path"])
+        if snapshot_key(key["path"]) != key:
+            return
+        meta = dict(key, sha256=digest, headers=headers, rows=len(table), phone_column=phone_column)
+        if table.profile is not None:
+            meta["profile"] = table.profile.to_dict()
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = f"{snap_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack(">HI", SNAPSHOT_VERSION, len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(payload)
+        os.replace(tmp_path, snap_path)
+        _evict_snapshots(keep=snap_path)
+    except Exception:
+        pass
+
+
+def _evict_snapshots(keep: str) -> None:
+    entries: list[tuple[float, int, str]] = []
+    for name in os.listdir(SNAPSHOT_DIR):
+        if not name.endswith(".snap"):
+            continue
+        full = os.path.join(SNAPSHOT_DIR, name)
+        try:
+            stat = os.stat(full)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, full))
+
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, full in sorted(entries):
+        if total <= SNAPSHOT_CACHE_LIMIT:
+            break
+        if full == keep:
+            continue
+        try:
+            os.remove(full)
+            total -= size
+        except OSError:
+            pass
+
+
+def load_records(
+    path: str, on_batch: BatchCallback | None = None, timer: PhaseTimer | None = None
+) -> tuple[list[str], RecordTable, str | None]:
+    if should_map_csv(path):
+        with timed(timer, "map"):
+            columns, mapped = read_csv_mapped(path, on_batch)
+        with timed(timer, "phone column"):
+            return columns, mapped, guess_phone_column(columns, mapped)
+
+    with timed(timer, "snapshot"):
+        snapshot = load_snapshot(path)
+    if snapshot is not None:
+        if on_batch is not None:
+            on_batch(snapshot[1], os.path.getsize(path))
+        return snapshot
+
+    with timed(timer, "snapshot"):
+        key = snapshot_key(path)
+    columns, records = read_tabular_records(path, on_batch, timer)
+    with timed(timer, "phone column"):
+        phone_column = guess_phone_column(columns, records)
+    if os.stat(path).st_mtime_ns == key["mtime_ns"]:
+        with timed(timer, "save snapshot"):
+            save_snapshot(key, columns, records, phone_column)
+    return columns, records, phone_column
+
+
+def _is_phone_like(value: str) -> bool:
+    text = (value or "").strip()
+    if not text:
+        return False
+    if "@" in text:
+        return False
+    digits = "".join(ch for ch in text if ch.isdigit())
+    return 7 <= len(digits) <= 15
+
+
+def guess_phone_column(columns: Iterable[str], records: Iterable[Mapping[str, str]] | None = None) -> str | None:
+    columns_list = list(columns)
+
+    keyword_hits: list[str] = []
+    for col in columns_list:
+        key = col.strip().casefold()
+        if any(
+            token in key
+            for token in (
+                "phone",
+                "mobile",
+                "tel",
+                "telephone",
+                "contact",
+                "cell",
+                "number",
+                "no.",
+                "ফোন",
+                "মোবাইল",
+                "যোগাযোগ",
+                "নম্বর",
+                "নং",
+            )
+        ):
+            keyword_hits.append(col)
+    if keyword_hits:
+        return keyword_hits[0]
+
+    if not records:
+        return None
+
+    best_col: str | None = None
+    best_score = 0.0
+
+    for col in columns_list:
+        score = _phone_like_ratio(col, records)
+        if score > best_score:
+            best_score = score
+            best_col = col
+
+    return best_col if best_score >= PHONE_COLUMN_MIN_RATIO else None
+
+
+def _phone_like_ratio(column: str, records: Iterable[Mapping[str, str]], max_rows: int = 250) -> float:
+    profile = records.profile if isinstance(records, RecordTable) else None
+    if profile is not None and column in profile.columns:
+        return profile.columns[column].phone_ratio
+    checked = 0
+    phone_like = 0
+    for idx, record in enumerate(records):
+        if idx >= max_rows:
+            break
+        value = record.get(column, "").strip()
+        if not value:
+            continue
+        checked += 1
+        if _is_phone_like(value):
+            phone_like += 1
+    return phone_like / checked if checked else 0.0
+
+
+def phone_like_columns(table: "RecordTable", phone_column: str | None = None) -> list[str]:
+    found = [phone_column] if phone_column in table.positions else []
+    for col in table.columns:
+        if col not in found and _phone_like_ratio(col, table) >= PHONE_COLUMN_MIN_RATIO:
+            found.append(col)
+    return found
+
+
+_BANGLA_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+_NON_DIGITS = re.compile(r"[^0-9]+")
+
+
+def canonical_phone(value: str) -> str:
+    digits = _NON_DIGITS.sub("", value.translate(_BANGLA_DIGITS))
+    if digits.startswith("880") and len(digits) > 10:
+        return "0" + digits[3:]
+    if len(digits) == 10 and digits.startswith("1"):
+        return "0" + digits
+    return digits
+
+
+def phone_query(query: str) -> str | None:
+    compact = "".join(query.split()).translate(_BANGLA_DIGITS)
+    digits = _NON_DIGITS.sub("", compact)
+    if len(digits) < PHONE_QUERY_MIN_DIGITS or len(digits) < 0.75 * len(compact):
+        return None
+    if digits.startswith("880") and len(digits) > 4:
+        return "0" + digits[3:]
+    return digits
+
+
+def phone_match_span(value: str, digits: str) -> tuple[int, int] | None:
+    translated = value.translate(_BANGLA_DIGITS)
+    positions = [pos for pos, ch in enumerate(translated) if "0" <= ch <= "9"]
+    canonical = canonical_phone(value)
+    start = canonical.find(digits) if digits else -1
+    if start < 0 or not positions:
+        return None
+    # The canonical form either replaced a leading "880" with "0" or prepended a "0".
+    offset = len(positions) - len(canonical)
+    first = max(start + offset, offset + 1 if offset > 0 else 0)
+    last = start + len(digits) - 1 + offset
+    if last < first:
+        return None
+    return positions[first], positions[last] + 1
+
+
+def detect_initial_csv_path(cli_path: str | None) -> str | None:
+    if cli_path and os.path.isfile(cli_path):
+        return cli_path
+
+    settings = load_settings()
+    last_path = settings.get("last_csv")
+    if isinstance(last_path, str) and os.path.isfile(last_path):
+        return last_path
+
+    for name in DEFAULT_DATA_CANDIDATES:
+        if os.path.isfile(name):
+            return name
+
+    try:
+        csv_files: list[str] = []
+        sample_file: str | None = None
+        for name in os.listdir("."):
+            if not (name.lower().endswith(".csv") and os.path.isfile(name)):
+                continue
+            if name.lower() == "teachers_sample.csv":
+                sample_file = name
+                continue
+            csv_files.append(name)
+
+        if csv_files:
+            return max(csv_files, key=lambda p: os.path.getmtime(p))
+        if sample_file:
+            return sample_file
+    except Exception:
+        pass
+    return None
+
+
+def _ngrams(text: str, size: int = 3) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class NgramIndex:
+    def __init__(self, texts: list[str], size: int = 3) -> None:
+        self.texts = texts
+        self.size = size
+        self.postings: dict[str, array[int]] = {}
+        seen: dict[str, set[str]] = {}
+        for row_id, text in enumerate(texts):
+            grams = seen.get(text)
+            if grams is None:
+                grams = _ngrams(text, size)
+                if len(seen) < INTERN_POOL_LIMIT:
+                    seen[text] = grams
+            for gram in grams:
+                bucket = self.postings.get(gram)
+                if bucket is None:
+                    self.postings[gram] = array("I", (row_id,))
+                else:
+                    bucket.append(row_id)
+
+    def search(self, query: str) -> list[int]:
+        texts = self.texts
+        if len(query) < self.size:
+            return [row_id for row_id, text in enumerate(texts) if query in text]
+
+        rarest: array[int] | None = None
+        for gram in _ngrams(query, self.size):
+            bucket = self.postings.get(gram)
+            if bucket is None:
+                return []
+            if rarest is None or len(bucket) < len(rarest):
+                rarest = bucket
+        return [row_id for row_id in rarest or () if query in texts[row_id]]
+
+    def refine(self, query: str, row_ids: list[int]) -> list[int]:
+        texts = self.texts
+        return [row_id for row_id in row_ids if query in texts[row_id]]
+
+    def estimate(self, query: str) -> int:
+        # Upper bound on the matches of query: the size of its rarest n-gram's posting list.
+        if len(query) < self.size:
+            return len(self.texts)
+        rarest = len(self.texts)
+        for gram in _ngrams(query, self.size):
+            bucket = self.postings.get(gram)
+            if bucket is None:
+                return 0
+            rarest = min(rarest, len(bucket))
+        return rarest
+
+
+class PhoneDigitIndex:
+    def __init__(self, table: RecordTable, columns: list[str]) -> None:
+        self.columns = columns
+        self.by_column = {
+            col: NgramIndex([canonical_phone(value) for value in table.column(col)], PHONE_GRAM_SIZE) for col in columns
+        }
+
+    def search(self, digits: str, column: str | None = None) -> list[int]:
+        if column is not None:
+            index = self.by_column.get(column)
+            return index.search(digits) if index is not None else []
+        hits: set[int] = set()
+        for index in self.by_column.values():
+            hits.update(index.search(digits))
+        return sorted(hits)
+
+
+_NAME_SEPARATORS = re.compile(r"[\s.,;:()/\-]+")
+
+
+def name_like_columns(columns: list[str]) -> list[str]:
+    found = [col for col in columns if any(token in col.strip().casefold() for token in NAME_COLUMN_KEYWORDS)]
+    return found or columns[:1]
+
+
+def _name_tokens(text: str) -> list[str]:
+    return [NAME_ALIASES.get(word, word) for word in _NAME_SEPARATORS.split(text.casefold()) if word]
+
+
+def _fuzzy_limit(length: int) -> int:
+    if length <= 3:
+        return 0
+    return 1 if length <= 6 else 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    # Levenshtein distance restricted to a band of width 2 * limit + 1; anything over limit is limit + 1.
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_best = current[0]
+        ch = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j - 1] + (ch != b[j - 1]), previous[j] + 1, current[j - 1] + 1, over)
+            current[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+def _token_similarity(query: str, token: str) -> float:
+    if token.startswith(query):
+        return 1.0 if len(token) == len(query) else 0.9 + 0.1 * len(query) / len(token)
+    limit = _fuzzy_limit(len(query))
+    distance = _edit_distance(query, token, limit)
+    if distance > limit:
+        return 0.0
+    return 1.0 - distance / max(len(query), len(token))
+
+
+class FuzzyIndex:
+    def __init__(self, texts: Iterable[str]) -> None:
+        self.tokens: list[str] = []
+        self.rows: list[array[int]] = []
+        token_ids: dict[str, int] = {}
+        seen: dict[str, set[str]] = {}
+        for row_id, text in enumerate(texts):
+            words = seen.get(text)
+            if words is None:
+                words = set(_name_tokens(text))
+                if len(seen) < INTERN_POOL_LIMIT:
+                    seen[text] = words
+            for word in words:
+                token_id = token_ids.get(word)
+                if token_id is None:
+                    token_id = token_ids[word] = len(self.tokens)
+                    self.tokens.append(word)
+                    self.rows.append(array("I"))
+                self.rows[token_id].append(row_id)
+
+        self.grams: dict[str, list[int]] = {}
+        for token_id, token in enumerate(self.tokens):
+            for gram in _ngrams(f"^{token}$"):
+                self.grams.setdefault(gram, []).append(token_id)
+
+    def _similar_tokens(self, word: str) -> dict[int, float]:
+        if len(word) < 3:
+            candidates: Iterable[int] = range(len(self.tokens))
+        else:
+            # Each edit touches at most three trigrams, and a prefix only lacks the trailing "$" one.
+            grams = _ngrams(f"^{word}$")
+            needed = max(1, len(grams) - 1 - 3 * _fuzzy_limit(len(word)))
+            counts: dict[int, int] = {}
+            for gram in grams:
+                for token_id in self.grams.get(gram, ()):
+                    counts[token_id] = counts.get(token_id, 0) + 1
+            candidates = [token_id for token_id, count in counts.items() if count >= needed]
+
+        similar: dict[int, float] = {}
+        for token_id in candidates:
+            similarity = _token_similarity(word, self.tokens[token_id])
+            if similarity > 0.0:
+                similar[token_id] = similarity
+        return similar
+
+    def search(self, query: str) -> list[int]:
+        scores: dict[int, float] | None = None
+        for word in _name_tokens(query):
+            word_scores: dict[int, float] = {}
+            for token_id, similarity in self._similar_tokens(word).items():
+                for row_id in self.rows[token_id]:
+                    if similarity > word_scores.get(row_id, 0.0):
+                        word_scores[row_id] = similarity
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {row_id: score + word_scores[row_id] for row_id, score in scores.items() if row_id in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return sorted(scores, key=lambda row_id: (-scores[row_id], row_id))
+
+
+class RecordSearchIndex:
+    def __init__(self, table: RecordTable, phone_column: str | None = None) -> None:
+        self.by_column = {col: NgramIndex([value.lower() for value in table.column(col)]) for col in table.columns}
+        phone_columns = phone_like_columns(table, phone_column)
+        self.phones = PhoneDigitIndex(table, phone_columns) if phone_columns else None
+        self._fuzzy: dict[tuple[str, ...], FuzzyIndex] = {}
+        self._history: list[tuple[str | None, str, list[int]]] = []
+
+    def _refine_all_columns(self, query: str, row_ids: Iterable[int]) -> list[int]:
+        # Values are joined with single spaces, so a space-free query matches a row exactly when one
+        # of its values contains it. Only a query with a space can span two values; those rows are
+        # joined one at a time rather than keeping a joined copy of the whole table.
+        row_ids = list(row_ids)
+        if " " not in query:
+            # Each column either answers from its own postings, when its rarest n-gram is rarer than the
+            # candidates, or checks the candidates that no earlier column has matched yet.
+            hits: set[int] = set()
+            for index in self.by_column.values():
+                if index.estimate(query) <= len(row_ids):
+                    hits.update(index.search(query))
+                    continue
+                texts = index.texts
+                found = [query in texts[row_id] for row_id in row_ids]
+                hits.update(compress(row_ids, found))
+                row_ids = [row_id for row_id, hit in zip(row_ids, found) if not hit]
+            return sorted(hits)
+        columns = [index.texts for index in self.by_column.values()]
+        joined = map(" ".join, zip(*(map(texts.__getitem__, row_ids) for texts in columns)))
+        return [row_id for row_id, text in zip(row_ids, joined) if query in text]
+
+    def _search_all_columns(self, query: str) -> list[int]:
+        # A space-free piece of the query always falls inside one column, where the per-column indexes can find it.
+        piece = max(query.split(" "), key=len)
+        if " " in query and len(piece) < 3:
+            return self._refine_all_columns(query, range(len(next(iter(self.by_column.values())).texts)))
+        hits: set[int] = set()
+        for index in self.by_column.values():
+            hits.update(index.search(piece))
+        if piece == query:
+            return sorted(hits)
+        return self._refine_all_columns(query, sorted(hits))
+
+    def fuzzy_search(self, query: str, column: str | None = None) -> list[int]:
+        columns = (column,) if column in self.by_column else tuple(name_like_columns(list(self.by_column)))
+        index = self._fuzzy.get(columns)
+        if index is None:
+            index = FuzzyIndex(" ".join(values) for values in zip(*(self.by_column[col].texts for col in columns)))
+            self._fuzzy[columns] = index
+        return index.search(query)
+
+    def digit_query(self, query: str, column: str | None = None) -> str | None:
+        if self.phones is None or (column is not None and column not in self.phones.by_column):
+            return None
+        return phone_query(query)
+
+    def search(self, query: str, column: str | None = None) -> list[int]:
+        index = self.by_column.get(column) if column else None
+        if index is None:
+            column = None
+
+        for pos in range(len(self._history) - 1, -1, -1):
+            prev_column, prev_query, prev_ids = self._history[pos]
+            if prev_column == column and prev_query == query:
+                self._history.append(self._history.pop(pos))
+                return prev_ids
+
+        digits = self.digit_query(query, column)
+        result: list[int] | None = None
+        for prev_column, prev_query, prev_ids in reversed(self._history):
+            if digits is None and prev_column == column and prev_query in query:
+                if index is not None:
+                    result = index.refine(query, prev_ids)
+                else:
+                    result = self._refine_all_columns(query, prev_ids)
+                break
+        if result is None:
+            result = index.search(query) if index is not None else self._search_all_columns(query)
+            if digits is not None and self.phones is not None:
+                result = sorted(set(result).union(self.phones.search(digits, column)))
+
+        self._history.append((column, query, result))
+        if len(self._history) > QUERY_HISTORY_SIZE:
+            del self._history[0]
+        return result
+
+
+def _caseless_pattern(text: str) -> "re.Pattern[bytes]":
+    parts: list[bytes] = []
+    for ch in text:
+        variants = sorted({v for v in (ch, ch.lower(), ch.upper()) if len(v) == 1})
+        encoded = [re.escape(v.encode("utf-8")) for v in variants]
+        parts.append(encoded[0] if len(encoded) == 1 else b"(?:" + b"|".join(encoded) + b")")
+    return re.compile(b"".join(parts))
+
+
+class MappedSearchIndex(RecordSearchIndex):
+    def __init__(self, table: MappedCsvTable, phone_column: str | None = None) -> None:
+        self.table = table
+        self.by_column = {}
+        self.phones = None
+        self._fuzzy = {}
+        self._history = []
+
+    def _row_matches(self, row_id: int, query: str, pos: int | None) -> bool:
+        values = self.table.row_values(row_id)
+        text = " ".join(values) if pos is None else values[pos]
+        return query in text.lower()
+
+    def _scan(self, query: str, pos: int | None) -> list[int]:
+        table = self.table
+        offsets = table.offsets
+        if not offsets:
+            return []
+        # A match of a needle free of spaces, quotes and delimiters lies inside one field, exactly as
+        # it would in the decoded value, unless that field is past the header's width. Anything else
+        # is confirmed by decoding the candidate row.
+        separators = {table.options["delimiter"], table.options["quotechar"]}
+        pieces = "".join(" " if ch.isspace() or ch in separators else ch for ch in query).split()
+        needle = max(pieces, key=len, default="")
+        exact = pos is None and needle == query
+        if not needle:
+            return [row_id for row_id in range(len(offsets)) if self._row_matches(row_id, query, pos)]
+
+        buffer = table.buffer
+        delimiter = table.options["delimiter"].encode("utf-8")
+        width = len(table.columns)
+        hits: list[int] = []
+        for row_id, match_start in self._needle_rows(needle):
+            if exact:
+                head = buffer[offsets[row_id] : match_start]
+                if table.quote not in head and head.count(delimiter) < width or self._row_matches(row_id, query, pos):
+                    hits.append(row_id)
+            elif self._row_matches(row_id, query, pos):
+                hits.append(row_id)
+        return hits
+
+    def _needle_rows(self, needle: str) -> Iterator[tuple[int, int]]:
+        table = self.table
+        offsets = table.offsets
+        buffer = table.buffer
+        end = table.end
+        count = len(offsets)
+
+        if not all(ch.isascii() or ch.lower() == ch.upper() for ch in needle):
+            pattern = _caseless_pattern(needle)
+            at = offsets[0]
+            while True:
+                match = pattern.search(buffer, at, end)
+                if match is None:
+                    return
+                row_id = bisect_right(offsets, match.start()) - 1
+                yield row_id, match.start()
+                at = offsets[row_id + 1] if row_id + 1 < count else end
+
+        # bytes.lower() only folds ASCII, which is all this needle needs, and runs at memory speed.
+        target = needle.lower().encode("utf-8")
+        first = 0
+        while first < count:
+            block_start = offsets[first]
+            last = bisect_right(offsets, block_start + MAPPED_CSV_BLOCK_SIZE, first + 1)
+            block = buffer[block_start : offsets[last] if last < count else end].lower()
+            at = 0
+            while True:
+                hit = block.find(target, at)
+                if hit < 0:
+                    break
+                row_id = bisect_right(offsets, block_start + hit, first, last) - 1
+                yield row_id, block_start + hit
+                at = (offsets[row_id + 1] if row_id + 1 < count else end) - block_start
+            first = last
+
+    def search(self, query: str, column: str | None = None) -> list[int]:
+        pos = self.table.positions.get(column) if column else None
+        if pos is None:
+            column = None
+
+        for index in range(len(self._history) - 1, -1, -1):
+            prev_column, prev_query, prev_ids = self._history[index]
+            if prev_column == column and prev_query == query:
+                self._history.append(self._history.pop(index))
+                return prev_ids
+
+        result: list[int] | None = None
+        for prev_column, prev_query, prev_ids in reversed(self._history):
+            if prev_column == column and prev_query in query:
+                result = [row_id for row_id in prev_ids if self._row_matches(row_id, query, pos)]
+                break
+        if result is None:
+            result = self._scan(query, pos)
+
+        self._history.append((column, query, result))
+        if len(self._history) > QUERY_HISTORY_SIZE:
+            del self._history[0]
+        return result
+
+    def fuzzy_search(self, query: str, column: str | None = None) -> list[int]:
+        table = self.table
+        columns = (column,) if column in table.positions else tuple(name_like_columns(table.columns))
+        index = self._fuzzy.get(columns)
+        if index is None:
+            positions = [table.positions[col] for col in columns]
+            index = FuzzyIndex(" ".join(values[pos] for pos in positions).lower() for values in table.iter_rows())
+            self._fuzzy[columns] = index
+        return index.search(query)
+
+
+def build_search_index(table: RecordTable, phone_column: str | None = None) -> RecordSearchIndex:
+    if isinstance(table, MappedCsvTable):
+        return MappedSearchIndex(table, phone_column)
+    return RecordSearchIndex(table, phone_column)
+
+
+def sort_key(value: str) -> tuple[int, str]:
+    normalized = value.strip()
+    digits = "".join(ch for ch in normalized if ch.isdigit())
+    if len(digits) >= 6:
+        return (0, digits)
+    return (1, normalized.casefold())
+
+
+class BackgroundLoad:
+    def __init__(
+        self,
+        path: str,
+        progressive: bool = True,
+        timer: PhaseTimer | None = None,
+        profile: ProfileSession | None = None,
+    ) -> None:
+        self.path = path
+        self.progressive = progressive
+        self.timer = timer
+        self.profile = profile
+        self.stamp = file_stamp(path)
+        self.messages: queue.Queue[tuple[str, Any, int]] = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="phonebook-load", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _on_batch(self, table: RecordTable, bytes_read: int) -> None:
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        if self.progressive:
+            self.messages.put(("batch", table, bytes_read))
+
+    def _run(self) -> None:
+        try:
+            with self.profile.profiled() if self.profile is not None else nullcontext():
+                self._load()
+        except Exception as e:
+            self.messages.put(("error", e, 0))
+
+    def _load(self) -> None:
+        try:
+            _columns, records, phone_column = load_records(self.path, self._on_batch, self.timer)
+            with timed(self.timer, "index"):
+                search_index = build_search_index(records, phone_column)
+        except LoadCancelled:
+            self.messages.put(("cancelled", None, 0))
+            return
+        except Exception as e:
+            self.messages.put(("error", e, 0))
+            return
+        if self._cancelled.is_set():
+            self.messages.put(("cancelled", None, 0))
+            return
+        self.messages.put(("done", (records, phone_column, search_index), 0))
+
+
+class BackgroundExport:
+    def __init__(self, path: str, columns: list[str], records: RecordView, phone_column: str | None = None) -> None:
+        self.path = path
+        self.columns = columns
+        self.records = records
+        self.phone_column = phone_column
+        self.messages: queue.Queue[tuple[str, Any, int]] = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="phonebook-export", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _on_progress(self, done: int, total: int) -> None:
+        if self._cancelled.is_set():
+            raise ExportCancelled()
+        self.messages.put(("progress", done, total))
+
+    def _run(self) -> None:
+        try:
+            export_records(self.path, self.columns, self.records, self.phone_column, self._on_progress)
+        except ExportCancelled:
+            self.messages.put(("cancelled", None, 0))
+            return
+        except Exception as e:
+            self.messages.put(("error", e, 0))
+            return
+        self.messages.put(("done", None, len(self.records)))
+
+
+class BackgroundMerge:
+    def __init__(
+        self, paths: Sequence[str], timer: PhaseTimer | None = None, profile: ProfileSession | None = None
+    ) -> None:
+        self.paths = list(paths)
+        self.timer = timer
+        self.profile = profile
+        self.messages: queue.Queue[tuple[str, Any, int]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="phonebook-merge", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            with self.profile.profiled() if self.profile is not None else nullcontext():
+                self._merge()
+        except Exception as e:
+            self.messages.put(("error", e, 0))
+
+    def _merge(self) -> None:
+        timer = self.timer
+        try:
+            with timed(timer, "read"):
+                columns, records = read_merged_records(self.paths)
+            with timed(timer, "phone column"):
+                phone_column = guess_phone_column(columns, records)
+            with timed(timer, "duplicates"):
+                groups = find_duplicates(records, phone_column)
+            with timed(timer, "index"):
+                search_index = build_search_index(records, phone_column)
+        except Exception as e:
+            self.messages.put(("error", e, 0))
+            return
+        self.messages.put(("done", (records, phone_column, search_index, groups), len(self.paths)))
+
+
+@dataclass
+class TableDiff:
+    added: list[int]
+    removed: list[int]
+    changed: list[tuple[int, int]]
+    matched: dict[int, int]
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+def diff_tables(old: RecordTable, new: RecordTable, key_column: str | None = None) -> TableDiff:
+    use_key = key_column is not None and key_column in old.positions and key_column in new.positions
+
+    def keyed_rows(table: RecordTable) -> Iterator[tuple[int, Any, tuple[str, ...]]]:
+        pos = table.positions[key_column] if use_key and key_column else None
+        for row_id in range(len(table)):
+            values = tuple(table.row_values(row_id))
+            yield row_id, (values[pos] if pos is not None and values[pos] else values), values
+
+    pending: dict[Any, list[tuple[int, tuple[str, ...]]]] = {}
+    for row_id, key, values in keyed_rows(old):
+        pending.setdefault(key, []).append((row_id, values))
+
+    added: list[int] = []
+    changed: list[tuple[int, int]] = []
+    matched: dict[int, int] = {}
+    for new_id, key, values in keyed_rows(new):
+        bucket = pending.get(key)
+        if not bucket:
+            added.append(new_id)
+            continue
+        old_id, old_values = bucket.pop(0)
+        matched[old_id] = new_id
+        if old_values != values:
+            changed.append((old_id, new_id))
+
+    removed = sorted(old_id for bucket in pending.values() for old_id, _values in bucket)
+    return TableDiff(added=added, removed=removed, changed=changed, matched=matched)
+
+
+_HONORIFIC_TOKENS = frozenset(NAME_ALIASES.values())
+
+
+def find_duplicates(table: RecordTable, phone_column: str | None = None) -> list[list[int]]:
+    columns = table.columns
+    if not columns:
+        return []
+    name_pos = table.positions[name_like_columns(columns)[0]]
+    email_pos = email_column(table)
+    department_pos = department_column(table)
+    phone_positions = [table.positions[col] for col in phone_like_columns(table, phone_column)]
+
+    names: list[frozenset[str]] = []
+    phones: list[frozenset[str]] = []
+    emails: list[str] = []
+    departments: list[str] = []
+    # Rows are only compared within a block (same phone, email or name), never all pairs.
+    blocks: dict[str, list[int]] = {}
+    for row_id in range(len(table)):
+        values = table.row_values(row_id)
+        tokens = frozenset(_name_tokens(values[name_pos]))
+        row_phones = frozenset(
+            digits
+            for digits in (canonical_phone(values[pos]) for pos in phone_positions)
+            if len(digits) >= DUPLICATE_MIN_PHONE_DIGITS
+        )
+        email = values[email_pos].strip().casefold() if email_pos is not None else ""
+        names.append(tokens)
+        phones.append(row_phones)
+        emails.append(email)
+        departments.append(values[department_pos].strip().casefold() if department_pos is not None else "")
+
+        for digits in row_phones:
+            blocks.setdefault("p" + digits, []).append(row_id)
+        if email:
+            blocks.setdefault("e" + email, []).append(row_id)
+        name_key = " ".join(sorted(tokens - _HONORIFIC_TOKENS))
+        if name_key:
+            blocks.setdefault("n" + name_key, []).append(row_id)
+
+    def same_teacher(a: int, b: int) -> bool:
+        if phones[a] and phones[b] and phones[a].isdisjoint(phones[b]):
+            return False
+        if emails[a] and emails[b] and emails[a] != emails[b]:
+            return False
+        if names[a] and names[b] and len(names[a] & names[b]) < DUPLICATE_NAME_MIN_OVERLAP * len(names[a] | names[b]):
+            return False
+        if phones[a] & phones[b] or (emails[a] and emails[a] == emails[b]):
+            return True
+        key = names[a] - _HONORIFIC_TOKENS
+        return bool(key) and key == names[b] - _HONORIFIC_TOKENS and departments[a] == departments[b]
+
+    parent = list(range(len(table)))
+    group_phones: dict[int, frozenset[str]] = {}
+    group_emails: dict[int, frozenset[str]] = {}
+
+    def find(row_id: int) -> int:
+        while parent[row_id] != row_id:
+            parent[row_id] = parent[parent[row_id]]
+            row_id = parent[row_id]
+        return row_id
+
+    def union(root_a: int, root_b: int) -> None:
+        # A row without a phone must not chain two teachers with different phones into one group.
+        phones_a = group_phones.get(root_a, phones[root_a])
+        phones_b = group_phones.get(root_b, phones[root_b])
+        emails_a = group_emails.get(root_a, frozenset((emails[root_a],)) - {""})
+        emails_b = group_emails.get(root_b, frozenset((emails[root_b],)) - {""})
+        if (phones_a and phones_b and phones_a.isdisjoint(phones_b)) or (
+            emails_a and emails_b and emails_a.isdisjoint(emails_b)
+        ):
+            return
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        parent[child] = root
+        group_phones[root] = phones_a | phones_b
+        group_emails[root] = emails_a | emails_b
+
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > DUPLICATE_WINDOW:
+            # Sorted neighbourhood: large blocks (common names) only compare nearby rows.
+            members = sorted(members, key=lambda r: (departments[r], emails[r], min(phones[r], default="")))
+        for idx, a in enumerate(members):
+            for b in members[idx + 1 : idx + DUPLICATE_WINDOW]:
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b and same_teacher(a, b):
+                    union(root_a, root_b)
+
+    groups: dict[int, list[int]] = {}
+    for row_id in range(len(table)):
+        groups.setdefault(find(row_id), []).append(row_id)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def merge_duplicates(table: RecordTable, groups: list[list[int]], phone_column: str | None = None) -> RecordTable:
+    # Phones, e-mails and sources can have several values; every other column (name, department,
+    # designation) keeps one representative: the longest spelling, which is usually the least abbreviated.
+    phone_positions = {table.positions[col] for col in phone_like_columns(table, phone_column)}
+    joined_positions = set(phone_positions)
+    joined_positions.add(email_column(table))
+    joined_positions.add(table.positions.get(SOURCE_COLUMN))
+    group_of = {row_id: group for group in groups for row_id in group}
+    merged = RecordTable(table.columns)
+    for row_id in range(len(table)):
+        group = group_of.get(row_id)
+        if group is None:
+            merged.append(table.row_values(row_id))
+            continue
+        if row_id != group[0]:
+            continue
+        values = []
+        for pos, candidates in enumerate(zip(*(table.row_values(member) for member in group))):
+            distinct: dict[str, str] = {}
+            for value in candidates:
+                if value:
+                    key = canonical_phone(value) if pos in phone_positions else value.strip().casefold()
+                    distinct.setdefault(key or value, value)
+            if pos in joined_positions:
+                values.append(MERGE_SEPARATOR.join(distinct.values()))
+            else:
+                values.append(max(distinct.values(), key=len, default=""))
+        merged.append(values)
+    return merged
+
+
+def file_stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass(frozen=True)
+class SortState:
+    column: str
+    reverse: bool
+
+
+QUERY_FIELDS: dict[str, str] = {
+    "name": "name",
+    "teacher": "name",
+    "নাম": "name",
+    "dept": "department",
+    "department": "department",
+    "faculty": "department",
+    "বিভাগ": "department",
+    "designation": "designation",
+    "title": "designation",
+    "post": "designation",
+    "rank": "designation",
+    "পদবি": "designation",
+    "পদবী": "designation",
+    "phone": "phone",
+    "mobile": "phone",
+    "tel": "phone",
+    "ফোন": "phone",
+    "মোবাইল": "phone",
+    "email": "email",
+    "e-mail": "email",
+    "mail": "email",
+    "ইমেইল": "email",
+}
+
+_QUERY_TOKENS = re.compile(
+    r"""\s*(?:(?P<open>\()|(?P<close>\))|(?P<bar>\|)|(?P<neg>-(?=[^\s-]))?"""
+    r"""(?:(?P<field>[^\s:"()|]+):)?(?:"(?P<quoted>[^"]*)"?|(?P<word>[^\s"()|]+))?)"""
+)
+
+
+@dataclass
+class QueryTerm:
+    field: str | None
+    text: str
+    prefix: bool = False
+    quoted: bool = False
+
+
+@dataclass
+class QueryNot:
+    child: "QueryNode"
+
+
+@dataclass
+class QueryAnd:
+    children: list["QueryNode"]
+
+
+@dataclass
+class QueryOr:
+    children: list["QueryNode"]
+
+
+QueryNode = QueryTerm | QueryNot | QueryAnd | QueryOr
+
+
+def _query_tokens(query: str) -> list[tuple[str, Any]]:
+    tokens: list[tuple[str, Any]] = []
+    pos = 0
+    while pos < len(query):
+        match = _QUERY_TOKENS.match(query, pos)
+        if match is None or match.end() == pos:
+            pos += 1
+            continue
+        pos = match.end()
+        if match["open"]:
+            tokens.append(("(", None))
+        elif match["close"]:
+            tokens.append((")", None))
+        elif match["bar"]:
+            tokens.append(("OR", None))
+        elif match["quoted"] is None and match["word"] in ("OR", "AND", "NOT") and not match["field"]:
+            tokens.append((match["word"], None))
+        else:
+            quoted = match["quoted"] is not None
+            text = match["quoted"] if quoted else (match["word"] or "")
+            prefix = text.endswith("*")
+            text = text.rstrip("*") if prefix else text
+            if not text:
+                # "dept:", '""' or a lone "*": nothing to search for yet.
+                continue
+            term = QueryTerm(match["field"], text, prefix, quoted)
+            tokens.append(("-", term) if match["neg"] else ("term", term))
+    return tokens
+
+
+def parse_query(query: str) -> QueryNode:
+    # Lenient on purpose: the GUI parses every keystroke, so a missing ")" is closed at the end and a stray one is dropped.
+    tokens = _query_tokens(query)
+    pos = depth = 0
+
+    def peek() -> str | None:
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def parse_or() -> QueryNode:
+        nonlocal pos
+        children = [parse_and()]
+        while peek() == "OR":
+            pos += 1
+            children.append(parse_and())
+        children = [child for child in children if child != QueryAnd([])]
+        return children[0] if len(children) == 1 else QueryOr(children) if children else QueryAnd([])
+
+    def parse_and() -> QueryNode:
+        nonlocal pos
+        children: list[QueryNode] = []
+        while True:
+            kind = peek()
+            if kind == "AND":
+                pos += 1
+                continue
+            if kind is None or kind in ("OR", ")"):
+                if kind == ")" and depth == 0:
+                    pos += 1
+                    continue
+                break
+            node = parse_unary()
+            if node is not None:
+                children.append(node)
+        return children[0] if len(children) == 1 else QueryAnd(children)
+
+    def parse_unary() -> QueryNode | None:
+        nonlocal pos, depth
+        kind, term = tokens[pos]
+        pos += 1
+        if kind == "NOT":
+            if peek() in (None, "OR", ")"):
+                return None
+            child = parse_unary()
+            return QueryNot(child) if child is not None else None
+        if kind == "(":
+            depth += 1
+            node = parse_or()
+            depth -= 1
+            if peek() == ")":
+                pos += 1
+            return node
+        if kind == "-":
+            return QueryNot(term)
+        return term
+
+    return parse_or()
+
+
+def _balanced_query(query: str) -> bool:
+    depth = 0
+    quoted = False
+    for ch in query:
+        if ch == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0 and not quoted
+
+
+def _uses_query_syntax(node: QueryNode, table: RecordTable) -> bool:
+    if isinstance(node, QueryTerm):
+        return node.prefix or node.quoted or (node.field is not None and bool(query_field_columns(table, node.field)))
+    if isinstance(node, QueryAnd):
+        return any(_uses_query_syntax(child, table) for child in node.children)
+    return True
+
+
+def structured_query(query: str, table: RecordTable) -> QueryNode | None:
+    # Anything that is not well-formed query syntax with at least one term is plain text, and keeps the
+    # substring search (and its per-keystroke refinement cache): "(", '"', "*", "dept:" or "science (".
+    if not _balanced_query(query):
+        return None
+    node = parse_query(query)
+    if node == QueryAnd([]):
+        return None
+    return node if "(" in query or _uses_query_syntax(node, table) else None
+
+
+def query_field_columns(table: RecordTable, field: str) -> list[str]:
+    key = field.casefold()
+    for column in table.columns:
+        if column.casefold() == key:
+            return [column]
+    kind = QUERY_FIELDS.get(key)
+    pos: int | None = None
+    if kind == "name":
+        return name_like_columns(table.columns)
+    if kind == "phone":
+        return phone_like_columns(table, guess_phone_column(table.columns, table))
+    if kind == "department":
+        pos = department_column(table)
+    elif kind == "designation":
+        pos = _keyword_column(table.columns, DESIGNATION_COLUMN_KEYWORDS)
+    elif kind == "email":
+        pos = email_column(table)
+    return [table.columns[pos]] if pos is not None else []
+
+
+def _query_digits(digits: str, prefix: bool) -> str:
+    # Stored numbers are canonical (880 becomes 0). A prefix is the start of a number, so its country
+    # code is dropped even before the rest is typed: "+880*" means "0*".
+    if digits.startswith("880") and (prefix or len(digits) > 4):
+        return "0" + digits[3:]
+    return digits
+
+
+class TermPlan:
+    def __init__(self, table: RecordTable, index: RecordSearchIndex | None, term: QueryTerm) -> None:
+        self.term = term
+        self.count = len(table)
+        self.text = term.text.lower()
+        phones = index.phones if index is not None else None
+        columns = query_field_columns(table, term.field) if term.field else None
+        self.field = term.field if columns else None
+        if columns is None or not columns:
+            # An unknown field is not an error: "10:30" is just text.
+            self.text = (f"{term.field}:{term.text}" if term.field else term.text).lower()
+            columns = list(table.columns)
+        self.label = ", ".join(columns) if self.field else "any column"
+        self.digits: str | None = None
+        if phones is not None:
+            phone_columns = [col for col in phones.columns if col in columns]
+        elif self.field and QUERY_FIELDS.get(self.field.casefold()) == "phone":
+            phone_columns = columns
+        else:
+            phone_columns = []
+        if phone_columns:
+            digits = _NON_DIGITS.sub("", self.text.translate(_BANGLA_DIGITS)) if self.field else phone_query(self.text)
+            self.digits = _query_digits(digits, term.prefix) if digits else digits
+        self.phone_indexes = [phones.by_column[col] for col in phone_columns] if self.digits and phones else []
+        # Mapped tables have no phone index; their phone cells are canonicalized while scanning.
+        self.phone_positions = [table.positions[col] for col in phone_columns] if self.digits and not phones else []
+        if self.field and self.digits:
+            # phone:0171 matches digits only; the text columns list is empty for a pure phone field.
+            columns = [col for col in columns if col not in phone_columns]
+
+        by_column = index.by_column if index is not None else {}
+        self.positions = [table.positions[col] for col in columns]
+        self.indexes = [by_column.get(col) for col in columns]
+        self.table = table
+        self.word_start = re.compile(r"(?:^|[\s.,;:()/\-])" + re.escape(self.text)) if term.prefix else None
+
+    def _text(self, slot: int, row_id: int) -> str:
+        index = self.indexes[slot]
+        return index.texts[row_id] if index is not None else self.table.cell(row_id, self.positions[slot]).lower()
+
+    def matches(self, row_id: int) -> bool:
+        if not self.text:
+            return True
+        for slot in range(len(self.positions)):
+            value = self._text(slot, row_id)
+            if self.word_start.search(value) if self.word_start is not None else self.text in value:
+                return True
+        for index in self.phone_indexes:
+            value = index.texts[row_id]
+            if value.startswith(self.digits) if self.term.prefix else self.digits in value:
+                return True
+        for pos in self.phone_positions:
+            value = canonical_phone(self.table.cell(row_id, pos))
+            if value.startswith(self.digits) if self.term.prefix else self.digits in value:
+                return True
+        return False
+
+    def _scans(self) -> bool:
+        return bool(self.phone_positions) or any(index is None for index in self.indexes)
+
+    def estimate(self) -> int:
+        if not self.text:
+            return self.count
+        total = 0
+        for index in self.indexes:
+            total += index.estimate(self.text) if index is not None else self.count
+        for index in self.phone_indexes:
+            total += index.estimate(self.digits or "")
+        total += len(self.phone_positions) * self.count
+        return min(total, self.count)
+
+    def search(self) -> list[int]:
+        if not self.text:
+            return list(range(self.count))
+        if self._scans():
+            return [row_id for row_id in range(self.count) if self.matches(row_id)]
+        hits: set[int] = set()
+        for index in self.indexes:
+            hits.update(index.search(self.text))
+        for index in self.phone_indexes:
+            hits.update(index.search(self.digits or ""))
+        if self.term.prefix:
+            # The n-gram search found every row containing the text; keep those where it starts a word or number.
+            return [row_id for row_id in sorted(hits) if self.matches(row_id)]
+        return sorted(hits)
+
+    def explain(self, depth: int = 0) -> list[str]:
+        how = "starts with" if self.term.prefix else "contains"
+        lookup = "scan" if self._scans() else "index"
+        return [f"{'  ' * depth}{self.label} {how} {self.text!r} ({lookup}, ~{self.estimate()} rows)"]
+
+
+class NotPlan:
+    def __init__(self, child: "QueryPlan") -> None:
+        self.child = child
+        self.count = child.count
+
+    def matches(self, row_id: int) -> bool:
+        return not self.child.matches(row_id)
+
+    def estimate(self) -> int:
+        return self.count
+
+    def search(self) -> list[int]:
+        excluded = set(self.child.search())
+        return [row_id for row_id in range(self.count) if row_id not in excluded]
+
+    def explain(self, depth: int = 0) -> list[str]:
+        return [f"{'  ' * depth}NOT"] + self.child.explain(depth + 1)
+
+
+class AndPlan:
+    def __init__(self, children: list["QueryPlan"], count: int) -> None:
+        # Most selective first; negations can only filter, so they always run last.
+        self.children = sorted(children, key=lambda child: (isinstance(child, NotPlan), child.estimate()))
+        self.count = count
+
+    def matches(self, row_id: int) -> bool:
+        return all(child.matches(row_id) for child in self.children)
+
+    def estimate(self) -> int:
+        return min((child.estimate() for child in self.children), default=self.count)
+
+    def search(self) -> list[int]:
+        children = self.children
+        if not children:
+            return list(range(self.count))
+        first = children[0]
+        if isinstance(first, NotPlan):
+            return [row_id for row_id in range(self.count) if self.matches(row_id)]
+        row_ids = first.search()
+        for child in children[1:]:
+            if not row_ids:
+                break
+            if not isinstance(child, NotPlan) and child.estimate() < len(row_ids):
+                keep = set(child.search())
+                row_ids = [row_id for row_id in row_ids if row_id in keep]
+            else:
+                # Only the survivors are checked, which is cheaper than another index lookup once few remain.
+                row_ids = [row_id for row_id in row_ids if child.matches(row_id)]
+        return row_ids
+
+    def explain(self, depth: int = 0) -> list[str]:
+        lines = [f"{'  ' * depth}AND"]
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+        return lines
+
+
+class OrPlan:
+    def __init__(self, children: list["QueryPlan"], count: int) -> None:
+        self.children = children
+        self.count = count
+
+    def matches(self, row_id: int) -> bool:
+        return any(child.matches(row_id) for child in self.children)
+
+    def estimate(self) -> int:
+        return min(sum(child.estimate() for child in self.children), self.count)
+
+    def search(self) -> list[int]:
+        hits: set[int] = set()
+        for child in self.children:
+            hits.update(child.search())
+        return sorted(hits)
+
+    def explain(self, depth: int = 0) -> list[str]:
+        lines = [f"{'  ' * depth}OR"]
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+        return lines
+
+
+QueryPlan = TermPlan | NotPlan | AndPlan | OrPlan
+
+
+def plan_query(node: QueryNode, table: RecordTable, index: RecordSearchIndex | None) -> QueryPlan:
+    if isinstance(node, QueryTerm):
+        return TermPlan(table, index, node)
+    if isinstance(node, QueryNot):
+        return NotPlan(plan_query(node.child, table, index))
+    children = [plan_query(child, table, index) for child in node.children]
+    if isinstance(node, QueryOr):
+        return OrPlan(children, len(table))
+    return AndPlan(children, len(table))
+
+
+class SortCache:
+    def __init__(self, table: RecordTable) -> None:
+        self.table = table
+        self._keys: dict[str, list[tuple[int, str]]] = {}
+        self._orders: dict[tuple[str, bool], Sequence[int]] = {}
+
+    def order(self, column: str, reverse: bool) -> Sequence[int]:
+        order = self._orders.get((column, reverse))
+        if order is None:
+            keys = self._keys.get(column)
+            if keys is None:
+                keys = [sort_key(value) for value in self.table.column(column)]
+                self._keys[column] = keys
+            order = array("I", sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse))
+            self._orders[(column, reverse)] = order
+        return order
+
+    def sorted_records(self, row_ids: Sequence[int] | None, column: str, reverse: bool) -> RecordView:
+        order = self.order(column, reverse)
+        if row_ids is None:
+            return self.table.view(order)
+        keep = set(row_ids)
+        return self.table.view(array("I", [row_id for row_id in order if row_id in keep]))
+
+
+def _scope_query(node: QueryNode, column: str) -> QueryNode:
+    # The "In:" column choice applies to terms that do not name a field themselves.
+    if isinstance(node, QueryTerm):
+        return QueryTerm(column, node.text, node.prefix, node.quoted) if node.field is None else node
+    if isinstance(node, QueryNot):
+        return QueryNot(_scope_query(node.child, column))
+    children = [_scope_query(child, column) for child in node.children]
+    return QueryOr(children) if isinstance(node, QueryOr) else QueryAnd(children)
+
+
+def filter_records(
+    table: RecordTable,
+    search_index: RecordSearchIndex | None,
+    sort_cache: SortCache | None,
+    query: str,
+    column_choice: str = ALL_COLUMNS,
+    sort_state: SortState | None = None,
+    fuzzy: bool = False,
+    timer: PhaseTimer | None = None,
+) -> RecordView:
+    node = structured_query(query.strip(), table) if query.strip() else None
+    query = query.strip().lower()
+    row_ids: list[int] | None = None
+    if query:
+        if search_index is None:
+            with timed(timer, "index"):
+                search_index = build_search_index(table)
+        column = column_choice if column_choice != ALL_COLUMNS and column_choice in table.positions else None
+        with timed(timer, "filter"):
+            if node is not None:
+                if column is not None:
+                    node = _scope_query(node, column)
+                row_ids = plan_query(node, table, search_index).search()
+            elif fuzzy and search_index.digit_query(query, column) is None:
+                row_ids = search_index.fuzzy_search(query, column)
+            else:
+                row_ids = search_index.search(query, column)
+
+    if sort_state and sort_state.column in table.positions:
+        if sort_cache is None:
+            sort_cache = SortCache(table)
+        with timed(timer, "sort"):
+            return sort_cache.sorted_records(row_ids, sort_state.column, sort_state.reverse)
+    return table.view(row_ids)
@@ -0,0 +1,1095 @@
+import os
+import queue
+import sys
+import tkinter as tk
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from tkinter import filedialog, messagebox, ttk
+from tkinter import font as tkfont
+
+from phonebook import (
+    EXPORT_FORMATS,
+    BackgroundExport,
+    BackgroundLoad,
+    BackgroundMerge,
+    PhaseTimer,
+    ProfileSession,
+    RecordSearchIndex,
+    RecordTable,
+    RecordView,
+    RowView,
+    SortCache,
+    SortState,
+    build_search_index,
+    diff_tables,
+    file_stamp,
+    filter_records,
+    format_duration,
+    guess_phone_column,
+    load_settings,
+    merge_duplicates,
+    phone_match_span,
+    save_settings,
+    timed,
+)
+
+APP_TITLE = "Lakshmipur Government College – Teacher Phone Book"
+VIRTUAL_LIST_THRESHOLD = 1000
+VIRTUAL_LIST_OVERSCAN = 10
+LOAD_POLL_MS = 50
+WATCH_INTERVAL_MS = 2000
+AUTOSIZE_SAMPLE_ROWS = 80
+TEXT_WIDTH_CACHE_SIZE = 4096
+TEXT_WIDTH_EXACT_LENGTH = 32
+
+
+def set_windows_dpi_awareness() -> None:
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except Exception:
+            ctypes.windll.user32.SetProcessDPIAware()
+    except Exception:
+        return
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+class TextWidthCache:
+    def __init__(self, size: int = TEXT_WIDTH_CACHE_SIZE) -> None:
+        self.size = size
+        self._widths: OrderedDict[tuple[tuple, str], int] = OrderedDict()
+        self._chars: dict[tuple, dict[str, int]] = {}
+
+    @staticmethod
+    def font_key(fnt: tkfont.Font) -> tuple:
+        return tuple(sorted(fnt.actual().items()))
+
+    def measure(self, fnt: tkfont.Font, key: tuple, text: str) -> int:
+        # Every Font.measure() is a Tk round trip; long strings are estimated from per-character widths instead.
+        if len(text) > TEXT_WIDTH_EXACT_LENGTH:
+            chars = self._chars.setdefault(key, {})
+            width = 0
+            for ch in text:
+                char_width = chars.get(ch)
+                if char_width is None:
+                    char_width = chars[ch] = fnt.measure(ch)
+                width += char_width
+            return width
+
+        widths = self._widths
+        width = widths.get((key, text))
+        if width is not None:
+            widths.move_to_end((key, text))
+            return width
+        width = widths[(key, text)] = fnt.measure(text)
+        if len(widths) > self.size:
+            widths.popitem(last=False)
+        return width
+
+
+class PhoneBookApp(tk.Tk):
+    def __init__(self, initial_csv: str | None = None, profile: ProfileSession | None = None) -> None:
+        super().__init__()
+
+        self.title(APP_TITLE)
+        self.minsize(860, 560)
+        self.geometry("1100x700")
+
+        self.profile = profile
+        self.csv_path: str | None = None
+        self.columns: list[str] = []
+        self.all_records = RecordTable([])
+        self.filtered_records = self.all_records.view()
+        self.phone_column: str | None = None
+        self.sort_state: SortState | None = None
+        self.search_index: RecordSearchIndex | None = None
+        self._sort_cache = SortCache(self.all_records)
+
+        self._filter_job: str | None = None
+        self._load: BackgroundLoad | None = None
+        self._load_job: str | None = None
+        self._load_table: RecordTable | None = None
+        self._export: BackgroundExport | None = None
+        self._export_job: str | None = None
+        self._merge: BackgroundMerge | None = None
+        self._merge_job: str | None = None
+        self._duplicates: list[list[int]] = []
+        self._review: tk.Toplevel | None = None
+        self._file_stamp: tuple[int, int] | None = None
+        self._watch_job: str | None = None
+        self._rendered_rows: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {}
+        self._match_digits: str | None = None
+        self._match_positions: list[int] = []
+        self._context_item: str | None = None
+        self._selected_index: int | None = None
+        self._virtual = False
+        self._view_offset = 0
+        self._context_column: str | None = None
+        self._text_widths = TextWidthCache()
+        self._autosized: tuple[RecordTable, int, bool, tuple] | None = None
+
+        self.search_var = tk.StringVar()
+        self.search_column_var = tk.StringVar(value="All columns")
+        self.watch_var = tk.BooleanVar(value=bool(load_settings().get("watch_file", False)))
+        self.fuzzy_var = tk.BooleanVar(value=bool(load_settings().get("fuzzy_search", False)))
+
+        self._configure_theme()
+        self._build_ui()
+        self._wire_events()
+
+        if initial_csv:
+            self.load_csv(initial_csv)
+        else:
+            self._refresh_status("Ready. Open a CSV file to start.")
+        self._schedule_watch()
+
+    def _configure_theme(self) -> None:
+        style = ttk.Style(self)
+        try:
+            style.theme_use("clam")
+        except Exception:
+            pass
+
+        self.configure(padx=10, pady=10)
+        style.configure("Toolbar.TFrame", padding=(6, 6))
+        style.configure("Status.TLabel", padding=(6, 2))
+
+    def _build_ui(self) -> None:
+        self._build_toolbar()
+        self._build_filters()
+        self._build_table()
+        self._build_details()
+        self._build_statusbar()
+
+    def _build_toolbar(self) -> None:
+        frame = ttk.Frame(self, style="Toolbar.TFrame")
+        frame.pack(fill="x")
+
+        self.open_button = ttk.Button(frame, text="Open CSV…", command=self.open_csv_dialog)
+        self.open_button.pack(side="left")
+
+        self.merge_button = ttk.Button(frame, text="Merge Files…", command=self.merge_files_dialog)
+        self.merge_button.pack(side="left", padx=(8, 0))
+
+        self.reload_button = ttk.Button(frame, text="Reload", command=self.reload_csv, state="disabled")
+        self.reload_button.pack(side="left", padx=(8, 0))
+
+        self.export_button = ttk.Button(frame, text="Export Filtered…", command=self.export_filtered, state="disabled")
+        self.export_button.pack(side="left", padx=(8, 0))
+
+        self.review_button = ttk.Button(
+            frame, text="Review Duplicates…", command=self.review_duplicates, state="disabled"
+        )
+        self.review_button.pack(side="left", padx=(8, 0))
+
+        self.cancel_load_button = ttk.Button(frame, text="Cancel Load", command=self.cancel_load, state="disabled")
+        self.cancel_load_button.pack(side="left", padx=(8, 0))
+
+        self.watch_check = ttk.Checkbutton(
+            frame, text="Watch file", variable=self.watch_var, command=self._on_watch_toggled
+        )
+        self.watch_check.pack(side="left", padx=(8, 0))
+
+        ttk.Separator(frame, orient="vertical").pack(side="left", fill="y", padx=10)
+
+        self.help_button = ttk.Button(frame, text="Help", command=self.show_help)
+        self.help_button.pack(side="left")
+
+        self.file_label = ttk.Label(frame, text="No file loaded")
+        self.file_label.pack(side="right")
+
+    def _build_filters(self) -> None:
+        frame = ttk.Frame(self)
+        frame.pack(fill="x", pady=(10, 6))
+
+        ttk.Label(frame, text="Search:").pack(side="left")
+        self.search_entry = ttk.Entry(frame, textvariable=self.search_var)
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(6, 8))
+
+        ttk.Label(frame, text="In:").pack(side="left")
+        self.search_column_combo = ttk.Combobox(
+            frame,
+            textvariable=self.search_column_var,
+            state="readonly",
+            values=["All columns"],
+            width=18,
+        )
+        self.search_column_combo.pack(side="left", padx=(6, 8))
+
+        self.fuzzy_check = ttk.Checkbutton(frame, text="Fuzzy", variable=self.fuzzy_var, command=self._on_fuzzy_toggled)
+        self.fuzzy_check.pack(side="left", padx=(0, 8))
+
+        self.clear_button = ttk.Button(frame, text="Clear", command=self.clear_filters)
+        self.clear_button.pack(side="left")
+
+        self.count_label = ttk.Label(frame, text="0 records")
+        self.count_label.pack(side="right")
+
+    def _build_table(self) -> None:
+        outer = ttk.Frame(self)
+        outer.pack(fill="both", expand=True)
+
+        self.tree = ttk.Treeview(outer, show="headings", selectmode="browse")
+        self.vsb = ttk.Scrollbar(outer, orient="vertical", command=self.tree.yview)
+        hsb = ttk.Scrollbar(outer, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(yscrollcommand=self.vsb.set, xscrollcommand=hsb.set)
+        self.tree.tag_configure("phone_match", background="#fff4c2")
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        outer.grid_rowconfigure(0, weight=1)
+        outer.grid_columnconfigure(0, weight=1)
+
+    def _build_details(self) -> None:
+        frame = ttk.LabelFrame(self, text="Selected Teacher")
+        frame.pack(fill="x", pady=(10, 0))
+
+        self.details_text = tk.Text(frame, height=6, wrap="word", state="disabled")
+        self.details_text.tag_configure("match", background="#ffe27a")
+        self.details_text.pack(side="left", fill="both", expand=True, padx=(6, 0), pady=6)
+
+        actions = ttk.Frame(frame)
+        actions.pack(side="right", fill="y", padx=6, pady=6)
+
+        self.copy_phone_button = ttk.Button(actions, text="Copy Phone", command=self.copy_phone, state="disabled")
+        self.copy_phone_button.pack(fill="x", pady=(0, 6))
+
+        self.copy_row_button = ttk.Button(actions, text="Copy Row", command=self.copy_row, state="disabled")
+        self.copy_row_button.pack(fill="x", pady=(0, 6))
+
+        self.open_file_location_button = ttk.Button(
+            actions, text="Open File Location", command=self.open_file_location, state="disabled"
+        )
+        self.open_file_location_button.pack(fill="x")
+
+    def _build_statusbar(self) -> None:
+        self.status_var = tk.StringVar(value="")
+        label = ttk.Label(self, textvariable=self.status_var, style="Status.TLabel", anchor="w")
+        label.pack(fill="x", pady=(8, 0))
+
+    def _wire_events(self) -> None:
+        self.search_var.trace_add("write", lambda *_: self._schedule_filter())
+        self.search_column_var.trace_add("write", lambda *_: self._schedule_filter())
+
+        self.tree.bind("<<TreeviewSelect>>", lambda _e: self._on_select())
+        self.tree.bind("<Double-1>", lambda _e: self.copy_phone())
+        self.tree.bind("<Button-3>", self._show_context_menu)
+        self.tree.bind("<Configure>", lambda _e: self._render_window() if self._virtual else None)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+        for sequence, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page")):
+            self.tree.bind(sequence, lambda _e, s=step: self._on_tree_key(s))
+        self.tree.bind("<Home>", lambda _e: self._on_tree_key("home"))
+        self.tree.bind("<End>", lambda _e: self._on_tree_key("end"))
+
+    def _schedule_filter(self) -> None:
+        if self._filter_job:
+            try:
+                self.after_cancel(self._filter_job)
+            except Exception:
+                pass
+        self._filter_job = self.after(160, self.apply_filters)
+
+    def _refresh_status(self, text: str) -> None:
+        self.status_var.set(text)
+
+    def _new_timer(self, operation: str) -> PhaseTimer:
+        return self.profile.timer(operation) if self.profile is not None else PhaseTimer(operation)
+
+    def _timing_text(self, timer: PhaseTimer) -> str:
+        return f"{format_duration(timer.total)} ({timer.summary()})"
+
+    def _set_buttons_enabled(self, enabled: bool) -> None:
+        state = "normal" if enabled else "disabled"
+        self.reload_button.configure(state=state if self.csv_path else "disabled")
+        self.review_button.configure(state=state if self._duplicates else "disabled")
+        self.export_button.configure(state=state)
+        self.open_file_location_button.configure(state=state if self.csv_path else "disabled")
+
+    def open_csv_dialog(self) -> None:
+        path = filedialog.askopenfilename(
+            title="Open teacher data file",
+            filetypes=[
+                ("Data files", "*.csv;*.xlsx;*.xlsm;*.xltx;*.xltm"),
+                ("CSV files", "*.csv"),
+                ("Excel files", "*.xlsx;*.xlsm;*.xltx;*.xltm"),
+                ("All files", "*.*"),
+            ],
+        )
+        if not path:
+            return
+        self.load_csv(path)
+
+    def merge_files_dialog(self) -> None:
+        paths = filedialog.askopenfilenames(
+            title="Merge teacher data files",
+            filetypes=[
+                ("Data files", "*.csv;*.xlsx;*.xlsm;*.xltx;*.xltm"),
+                ("CSV files", "*.csv"),
+                ("Excel files", "*.xlsx;*.xlsm;*.xltx;*.xltm"),
+                ("All files", "*.*"),
+            ],
+        )
+        if not paths:
+            return
+        self._abandon_load()
+        merge = BackgroundMerge(paths, self._new_timer(f"merge {len(paths)} files"), self.profile)
+        self._merge = merge
+        self.merge_button.configure(state="disabled")
+        self._refresh_status(f"Merging {len(paths)} files…")
+        merge.start()
+        self._poll_merge()
+
+    def _poll_merge(self) -> None:
+        self._merge_job = None
+        merge = self._merge
+        if merge is None:
+            return
+        try:
+            kind, payload, count = merge.messages.get_nowait()
+        except queue.Empty:
+            self._merge_job = self.after(LOAD_POLL_MS, self._poll_merge)
+            return
+        self._merge = None
+        self.merge_button.configure(state="normal")
+        if kind == "done":
+            self._finish_merge(merge, count, *payload)
+        else:
+            self._refresh_status("Merge failed.")
+            messagebox.showerror("Could not merge files", f"{payload}")
+
+    def _finish_merge(
+        self,
+        merge: BackgroundMerge,
+        count: int,
+        records: RecordTable,
+        phone_column: str | None,
+        search_index: RecordSearchIndex,
+        groups: list[list[int]],
+    ) -> None:
+        self._show_table(None, records, f"{count} files merged")
+        self._duplicates = groups
+        self.phone_column = phone_column
+        self.search_index = search_index
+        self.apply_filters(force_refresh=True, timer=merge.timer)
+        self._set_buttons_enabled(True)
+        duplicates = sum(len(group) for group in groups)
+        timing = f" in {self._timing_text(merge.timer)}" if merge.timer is not None else ""
+        self._refresh_status(
+            f"Merged {len(records)} teachers from {count} files{timing}; "
+            f"{len(groups)} possible duplicates ({duplicates} rows)."
+        )
+
+    def load_csv(self, path: str) -> None:
+        self._abandon_load()
+        load = BackgroundLoad(path, timer=self._new_timer(f"load {os.path.basename(path)}"), profile=self.profile)
+        self._load = load
+        self._load_table = None
+        self.cancel_load_button.configure(state="normal")
+        if self._export is None:
+            self.export_button.configure(state="disabled")
+        self._refresh_status(f"Loading {os.path.basename(path)}…")
+        load.start()
+        self._poll_load()
+
+    def cancel_load(self) -> None:
+        if self._load:
+            self._load.cancel()
+
+    def _abandon_load(self) -> None:
+        if self._load:
+            self._load.cancel()
+            self._load = None
+        if self._load_job:
+            try:
+                self.after_cancel(self._load_job)
+            except Exception:
+                pass
+            self._load_job = None
+        self.cancel_load_button.configure(state="disabled")
+
+    def _poll_load(self) -> None:
+        self._load_job = None
+        load = self._load
+        if load is None:
+            return
+        while self._load is load:
+            try:
+                kind, payload, bytes_read = load.messages.get_nowait()
+            except queue.Empty:
+                self._load_job = self.after(LOAD_POLL_MS, self._poll_load)
+                return
+            if kind == "batch":
+                self._on_load_batch(load, payload, bytes_read)
+            elif kind == "done" and not load.progressive:
+                self._abandon_load()
+                self._apply_file_change(load, *payload)
+            elif kind == "done":
+                records, phone_column, search_index = payload
+                self._finish_load(load, records, phone_column, search_index)
+            elif kind == "cancelled" and not load.progressive:
+                self._abandon_load()
+            elif kind == "cancelled":
+                self._finish_load(load, self._load_table)
+            elif not load.progressive:
+                self._abandon_load()
+                self._set_buttons_enabled(bool(self.all_records))
+                self._refresh_status(f"Could not reload {os.path.basename(load.path)}: {payload}")
+            else:
+                self._abandon_load()
+                self._set_buttons_enabled(bool(self.all_records))
+                self._refresh_status(f"Could not load {os.path.basename(load.path)}.")
+                messagebox.showerror("Could not load file", f"{payload}")
+
+    def _show_table(self, path: str | None, table: RecordTable, label: str | None = None) -> None:
+        self.csv_path = os.path.abspath(path) if path else None
+        self._file_stamp = None
+        self._duplicates = []
+        self._close_review()
+        self.columns = table.columns
+        self.all_records = table
+        self.phone_column = None
+        self.sort_state = None
+        self.search_index = None
+        self._match_digits = None
+        self._match_positions = []
+        self._sort_cache = SortCache(table)
+        self._configure_tree_columns()
+        self.filtered_records = table.view()
+        self._render_records(self.filtered_records)
+        self.file_label.configure(text=label or os.path.basename(self.csv_path or ""))
+        self.reload_button.configure(state="normal" if self.csv_path else "disabled")
+
+    def _on_load_batch(self, load: BackgroundLoad, table: RecordTable, bytes_read: int) -> None:
+        if self._load_table is not table:
+            self._load_table = table
+            self._show_table(load.path, table)
+        else:
+            shown = len(self.filtered_records)
+            self.filtered_records = table.view()
+            if self._virtual:
+                self._render_window()
+            elif shown < self._visible_row_count():
+                self._render_records(self.filtered_records)
+
+        self.count_label.configure(text=f"{len(table)} records")
+        self._refresh_status(
+            f"Loading {os.path.basename(load.path)}… {len(table)} rows, {_format_bytes(bytes_read)} read"
+        )
+
+    def _finish_load(
+        self,
+        load: BackgroundLoad,
+        records: RecordTable | None,
+        phone_column: str | None = None,
+        search_index: RecordSearchIndex | None = None,
+    ) -> None:
+        self._abandon_load()
+        if records is None:
+            self._set_buttons_enabled(bool(self.all_records))
+            self._refresh_status(f"Cancelled loading {os.path.basename(load.path)}.")
+            return
+
+        complete = search_index is not None
+        # A cancelled load shows only part of the file, so there is nothing to watch for changes.
+        self._file_stamp = load.stamp if complete else None
+        self.all_records = records
+        self.phone_column = phone_column if complete else guess_phone_column(records.columns, records)
+        self.search_index = search_index
+        self._sort_cache = SortCache(records)
+        self.apply_filters(force_refresh=True, timer=load.timer)
+        self._set_buttons_enabled(True)
+
+        if not complete:
+            self._refresh_status(f"Cancelled loading: showing the first {len(records)} teachers.")
+            return
+        timing = f" in {self._timing_text(load.timer)}" if load.timer is not None else ""
+        self._refresh_status(f"Loaded {len(self.all_records)} teachers from {os.path.basename(load.path)}{timing}")
+
+        settings = load_settings()
+        settings["last_csv"] = self.csv_path
+        save_settings(settings)
+
+    def _on_watch_toggled(self) -> None:
+        settings = load_settings()
+        settings["watch_file"] = bool(self.watch_var.get())
+        save_settings(settings)
+        self._schedule_watch()
+
+    def _on_fuzzy_toggled(self) -> None:
+        settings = load_settings()
+        settings["fuzzy_search"] = bool(self.fuzzy_var.get())
+        save_settings(settings)
+        self._schedule_filter()
+
+    def _schedule_watch(self) -> None:
+        if self._watch_job:
+            try:
+                self.after_cancel(self._watch_job)
+            except Exception:
+                pass
+            self._watch_job = None
+        if self.watch_var.get():
+            self._watch_job = self.after(WATCH_INTERVAL_MS, self._check_watched_file)
+
+    def _check_watched_file(self) -> None:
+        self._watch_job = None
+        if self.csv_path and self._load is None and self._file_stamp is not None:
+            stamp = file_stamp(self.csv_path)
+            if stamp is not None and stamp != self._file_stamp:
+                load = BackgroundLoad(
+                    self.csv_path,
+                    progressive=False,
+                    timer=self._new_timer(f"reload {os.path.basename(self.csv_path)}"),
+                    profile=self.profile,
+                )
+                self._load = load
+                load.start()
+                self._poll_load()
+        self._schedule_watch()
+
+    def _apply_file_change(
+        self,
+        load: BackgroundLoad,
+        records: RecordTable,
+        phone_column: str | None,
+        search_index: RecordSearchIndex,
+    ) -> None:
+        if load.stamp != file_stamp(load.path):
+            return
+        if records.columns != self.all_records.columns:
+            self._show_table(load.path, records)
+            self._finish_load(load, records, phone_column, search_index)
+            self._refresh_status(f"{os.path.basename(load.path)} changed: columns differ, reloaded.")
+            return
+
+        diff = diff_tables(self.all_records, records, self.phone_column)
+        self._file_stamp = load.stamp
+        if not (diff.added or diff.removed or diff.changed):
+            return
+
+        selected = self._selected_record()
+        selected_row = diff.matched.get(selected.row_id) if selected is not None else None
+        offset = self._view_offset
+
+        self.all_records = records
+        self.phone_column = phone_column
+        self.search_index = search_index
+        self._sort_cache = SortCache(records)
+        self.filtered_records = self._filtered_view()
+
+        self._selected_index = None
+        if selected_row is not None:
+            row_ids = self.filtered_records.row_ids
+            try:
+                self._selected_index = row_ids.index(selected_row)
+            except ValueError:
+                pass
+        self._view_offset = offset
+        self._set_virtual(len(self.filtered_records) > VIRTUAL_LIST_THRESHOLD)
+        self._render_window()
+        self._on_select()
+        self.count_label.configure(text=f"{len(self.filtered_records)} / {len(self.all_records)} records")
+        self._refresh_status(f"{os.path.basename(load.path)} changed: {diff.summary()}.")
+
+    def reload_csv(self) -> None:
+        if not self.csv_path:
+            return
+        self.load_csv(self.csv_path)
+
+    def clear_filters(self) -> None:
+        self.search_var.set("")
+        self.search_column_var.set("All columns")
+        self.apply_filters(force_refresh=True)
+
+    def apply_filters(self, force_refresh: bool = False, timer: PhaseTimer | None = None) -> None:
+        if self._load is not None and self._load.progressive:
+            return
+        if not self.all_records:
+            if force_refresh:
+                self.filtered_records = self.all_records.view()
+                self._render_records(self.filtered_records)
+            return
+
+        # A caller that passes its own timer (a load or merge) reports the timings in its own status message.
+        report = timer is None
+        if timer is None:
+            timer = self._new_timer("filter")
+        filtered = self._filtered_view(timer)
+        self.filtered_records = filtered
+        self._render_records(filtered, timer)
+
+        self.count_label.configure(text=f"{len(filtered)} / {len(self.all_records)} records")
+        self.copy_row_button.configure(state="normal" if self._selected_record() else "disabled")
+        self.copy_phone_button.configure(
+            state="normal" if (self._selected_record() and self.phone_column) else "disabled"
+        )
+        if report:
+            self._refresh_status(f"{len(filtered)} teachers shown in {self._timing_text(timer)}")
+
+    def _filtered_view(self, timer: PhaseTimer | None = None) -> RecordView:
+        query = self.search_var.get()
+        column = self.search_column_var.get()
+        if self.search_index is None and query.strip():
+            with timed(timer, "index"):
+                self.search_index = build_search_index(self.all_records, self.phone_column)
+
+        phones = self.search_index.phones if self.search_index is not None else None
+        search_column = column if column in self.all_records.positions else None
+        digits = self.search_index.digit_query(query, search_column) if self.search_index and phones else None
+        match_columns = [search_column] if search_column else phones.columns if phones else []
+        self._match_digits = digits
+        self._match_positions = [self.all_records.positions[col] for col in match_columns] if digits else []
+        return filter_records(
+            self.all_records,
+            self.search_index,
+            self._sort_cache,
+            query,
+            column,
+            self.sort_state,
+            bool(self.fuzzy_var.get()),
+            timer,
+        )
+
+    def _configure_tree_columns(self) -> None:
+        self.tree.configure(columns=self.columns)
+        self.tree.delete(*self.tree.get_children())
+        self._rendered_rows = {}
+        self._autosized = None
+
+        for col in self.columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self._toggle_sort(c))
+            self.tree.column(col, width=150, anchor="w")
+
+        self.search_column_combo.configure(values=["All columns"] + self.columns)
+        self.search_column_var.set("All columns")
+
+    def _toggle_sort(self, column: str) -> None:
+        if not self.filtered_records:
+            return
+        if self.sort_state and self.sort_state.column == column:
+            new_state = SortState(column=column, reverse=not self.sort_state.reverse)
+        else:
+            new_state = SortState(column=column, reverse=False)
+        self.sort_state = new_state
+        self.apply_filters(force_refresh=True)
+
+    def _render_records(self, records: RecordView, timer: PhaseTimer | None = None) -> None:
+        self._set_virtual(len(records) > VIRTUAL_LIST_THRESHOLD)
+        self._view_offset = 0
+        self._selected_index = None
+        with timed(timer, "render"):
+            self._render_window()
+        with timed(timer, "autosize"):
+            self._autosize_columns(records)
+        self._on_select()
+
+    def _set_virtual(self, virtual: bool) -> None:
+        self._virtual = virtual
+        if virtual:
+            self.vsb.configure(command=self._on_vscroll)
+            self.tree.configure(yscrollcommand="")
+        else:
+            self.vsb.configure(command=self.tree.yview)
+            self.tree.configure(yscrollcommand=self.vsb.set)
+
+    def _render_window(self) -> None:
+        records = self.filtered_records
+        total = len(records)
+        if self._virtual:
+            visible = self._visible_row_count()
+            self._view_offset = max(0, min(self._view_offset, total - visible))
+            start = self._view_offset
+            end = min(total, start + visible + VIRTUAL_LIST_OVERSCAN)
+        else:
+            visible = total
+            start, end = 0, total
+
+        rendered = self._rendered_rows
+        stale = [iid for iid in rendered if not start <= int(iid) < end]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del rendered[iid]
+        for pos, idx in enumerate(range(start, end)):
+            iid = str(idx)
+            values = tuple(records.row_values(idx))
+            tags = self._row_tags(values)
+            previous = rendered.get(iid)
+            if previous is None:
+                self.tree.insert("", pos, iid=iid, values=values, tags=tags)
+            elif previous != (values, tags):
+                self.tree.item(iid, values=values, tags=tags)
+            else:
+                continue
+            rendered[iid] = (values, tags)
+
+        selected = self._selected_index
+        if selected is not None and start <= selected < end:
+            self.tree.selection_set(str(selected))
+            self.tree.focus(str(selected))
+        elif self.tree.selection():
+            self.tree.selection_set(())
+        if self._virtual and total:
+            self.vsb.set(start / total, min(total, start + visible) / total)
+
+    def _row_tags(self, values: tuple[str, ...]) -> tuple[str, ...]:
+        digits = self._match_digits
+        if digits and any(phone_match_span(values[pos], digits) for pos in self._match_positions):
+            return ("phone_match",)
+        return ()
+
+    def _visible_row_count(self) -> int:
+        try:
+            row_height = int(ttk.Style(self).lookup("Treeview", "rowheight"))
+        except Exception:
+            row_height = 0
+        if row_height <= 0:
+            row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") + 4
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def _scroll_to(self, offset: int) -> None:
+        self._view_offset = max(0, offset)
+        self._render_window()
+
+    def _on_vscroll(self, action: str, value: str, unit: str | None = None) -> None:
+        if action == "moveto":
+            self._scroll_to(int(float(value) * len(self.filtered_records)))
+        elif action == "scroll":
+            step = int(value) * (self._visible_row_count() if unit == "pages" else 1)
+            self._scroll_to(self._view_offset + step)
+
+    def _on_mousewheel(self, event: tk.Event) -> str | None:
+        if not self._virtual:
+            return None
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self._scroll_to(self._view_offset + step)
+        return "break"
+
+    def _on_tree_key(self, step: int | str) -> str | None:
+        if not self._virtual:
+            return None
+        total = len(self.filtered_records)
+        visible = self._visible_row_count()
+        current = self._selected_index if self._selected_index is not None else self._view_offset - 1
+        if step == "home":
+            target = 0
+        elif step == "end":
+            target = total - 1
+        elif step == "page":
+            target = current + visible
+        elif step == "-page":
+            target = current - visible
+        else:
+            target = current + int(step)
+        target = max(0, min(total - 1, target))
+
+        self._selected_index = target
+        if target < self._view_offset:
+            self._view_offset = target
+        elif target >= self._view_offset + visible:
+            self._view_offset = target - visible + 1
+        self._render_window()
+        self._on_select()
+        return "break"
+
+    def _autosize_columns(self, records: RecordView) -> None:
+        if not self.columns:
+            return
+        fnt = tkfont.nametofont("TkDefaultFont")
+        key = self._text_widths.font_key(fnt)
+        table = records.table
+        profile = table.profile
+        # Widths depend on the whole table, not on the current filter or sort, so they only change with the data or font.
+        state = (table, len(table), profile is not None, key)
+        previous = self._autosized
+        if previous is not None and previous[0] is table and previous[1:] == state[1:]:
+            return
+        self._autosized = state
+
+        measure = self._text_widths.measure
+        sample = table[:AUTOSIZE_SAMPLE_ROWS]
+        for col in self.columns:
+            header_w = measure(fnt, key, col) + 22
+            value_w = header_w
+            stats = profile.columns.get(col) if profile is not None else None
+            if stats is not None:
+                # Wide enough for 95% of the values in the file, measured on a prefix of the longest one.
+                value_w = max(value_w, measure(fnt, key, stats.longest[: stats.length_percentiles[95]]) + 22)
+            else:
+                for record in sample:
+                    value = record.get(col, "")
+                    value_w = max(value_w, measure(fnt, key, value) + 22)
+            self.tree.column(col, width=min(max(90, value_w), 420))
+
+    def _selected_record(self) -> RowView | None:
+        idx = self._selected_index
+        if idx is None or not self.columns or not (0 <= idx < len(self.filtered_records)):
+            return None
+        return self.filtered_records[idx]
+
+    def _on_select(self) -> None:
+        sel = self.tree.selection()
+        if sel:
+            self._selected_index = int(sel[0])
+        record = self._selected_record()
+        self._set_details(record)
+        self.copy_row_button.configure(state="normal" if record else "disabled")
+        self.copy_phone_button.configure(state="normal" if (record and self.phone_column) else "disabled")
+
+    def _set_details(self, record: Mapping[str, str] | None) -> None:
+        self.details_text.configure(state="normal")
+        self.details_text.delete("1.0", "end")
+        if not record:
+            self.details_text.insert("1.0", "Select a teacher from the table to see details.")
+        else:
+            lines = []
+            spans = []
+            match_columns = {self.columns[pos] for pos in self._match_positions if pos < len(self.columns)}
+            for col in self.columns:
+                value = record.get(col, "")
+                if value:
+                    span = phone_match_span(value, self._match_digits) if col in match_columns and self._match_digits else None
+                    if span:
+                        spans.append((len(lines) + 1, len(col) + 2 + span[0], len(col) + 2 + span[1]))
+                    lines.append(f"{col}: {value}")
+            self.details_text.insert("1.0", "\n".join(lines) if lines else "(No details)")
+            for line, start, end in spans:
+                self.details_text.tag_add("match", f"{line}.{start}", f"{line}.{end}")
+        self.details_text.configure(state="disabled")
+
+    def copy_phone(self) -> None:
+        record = self._selected_record()
+        if not record:
+            return
+        if not self.phone_column:
+            messagebox.showinfo("Phone column not found", "No phone/mobile column was detected in your CSV headers.")
+            return
+
+        phone = record.get(self.phone_column, "").strip()
+        if not phone:
+            messagebox.showinfo("No phone number", "The selected teacher record has no phone number in the phone column.")
+            return
+
+        self.clipboard_clear()
+        self.clipboard_append(phone)
+        self._refresh_status(f"Copied phone: {phone}")
+
+    def copy_row(self) -> None:
+        record = self._selected_record()
+        if not record:
+            return
+        text = "\t".join(record.get(c, "") for c in self.columns)
+        self.clipboard_clear()
+        self.clipboard_append(text)
+        self._refresh_status("Copied selected row to clipboard (tab-separated).")
+
+    def export_filtered(self) -> None:
+        if self._export is not None:
+            self._export.cancel()
+            return
+        if not self.filtered_records or not self.columns:
+            return
+        self._start_export(self.filtered_records, "Export filtered teachers")
+
+    def _start_export(self, records: RecordView, title: str, parent: tk.Misc | None = None) -> None:
+        default_name = f"teachers_export_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+        path = filedialog.asksaveasfilename(
+            parent=parent or self,
+            title=title,
+            defaultextension=".csv",
+            initialfile=default_name,
+            filetypes=[(label, f"*{ext}") for ext, label in EXPORT_FORMATS.items()],
+        )
+        if not path:
+            return
+        export = BackgroundExport(path, self.columns, records, self.phone_column)
+        self._export = export
+        self.export_button.configure(text="Cancel Export")
+        self._refresh_status(f"Exporting to {os.path.basename(path)}…")
+        export.start()
+        self._poll_export()
+
+    def _poll_export(self) -> None:
+        self._export_job = None
+        export = self._export
+        if export is None:
+            return
+        while True:
+            try:
+                kind, payload, count = export.messages.get_nowait()
+            except queue.Empty:
+                self._export_job = self.after(LOAD_POLL_MS, self._poll_export)
+                return
+            if kind == "progress":
+                self._refresh_status(f"Exporting to {os.path.basename(export.path)}… {payload} / {count} records")
+                continue
+            self._export = None
+            self.export_button.configure(text="Export Filtered…")
+            if kind == "done":
+                self._refresh_status(f"Exported {count} records to {os.path.basename(export.path)}")
+            elif kind == "cancelled":
+                self._refresh_status("Export cancelled.")
+            else:
+                self._refresh_status("Export failed.")
+                messagebox.showerror("Export failed", f"{payload}")
+            return
+
+    def review_duplicates(self) -> None:
+        if self._review is not None:
+            self._review.lift()
+            return
+        review = tk.Toplevel(self)
+        review.title("Review Duplicates")
+        review.geometry("900x480")
+        review.protocol("WM_DELETE_WINDOW", self._close_review)
+        self._review = review
+
+        tree = ttk.Treeview(review, columns=self.columns, selectmode="extended")
+        vsb = ttk.Scrollbar(review, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.heading("#0", text="Group")
+        tree.column("#0", width=110, stretch=False)
+        for col in self.columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=140, anchor="w")
+
+        actions = ttk.Frame(review, padding=(0, 6))
+        actions.pack(side="bottom", fill="x")
+        tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+
+        summary = ttk.Label(actions)
+        summary.pack(side="left")
+
+        def refresh() -> None:
+            tree.delete(*tree.get_children())
+            for number, group in enumerate(self._duplicates):
+                parent = tree.insert("", "end", iid=f"g{number}", text=f"#{number + 1} ({len(group)})", open=True)
+                for row_id in group:
+                    tree.insert(parent, "end", text="", values=self.all_records.row_values(row_id))
+            summary.configure(text=f"{len(self._duplicates)} groups")
+
+        def not_duplicates() -> None:
+            selected = {tree.parent(item) or item for item in tree.selection()}
+            drop = {int(item[1:]) for item in selected}
+            self._duplicates = [group for number, group in enumerate(self._duplicates) if number not in drop]
+            self.review_button.configure(state="normal" if self._duplicates else "disabled")
+            refresh()
+
+        def merge_all() -> None:
+            if not self._duplicates:
+                return
+            merged = len(self._duplicates)
+            records = merge_duplicates(self.all_records, self._duplicates, self.phone_column)
+            self._show_table(None, records, self.file_label.cget("text"))
+            self.phone_column = guess_phone_column(records.columns, records)
+            self.apply_filters(force_refresh=True)
+            self._set_buttons_enabled(True)
+            self._refresh_status(f"Merged {merged} duplicate groups: {len(records)} teachers.")
+
+        def export_deduplicated() -> None:
+            if self._export is not None:
+                return
+            records = merge_duplicates(self.all_records, self._duplicates, self.phone_column)
+            self._start_export(records.view(), "Export deduplicated teachers", review)
+
+        ttk.Button(actions, text="Not Duplicates", command=not_duplicates).pack(side="right")
+        ttk.Button(actions, text="Export Deduplicated…", command=export_deduplicated).pack(side="right", padx=(0, 8))
+        ttk.Button(actions, text="Merge All", command=merge_all).pack(side="right", padx=(0, 8))
+        refresh()
+
+    def _close_review(self) -> None:
+        if self._review is not None:
+            self._review.destroy()
+            self._review = None
+
+    def open_file_location(self) -> None:
+        if not self.csv_path:
+            return
+        folder = os.path.dirname(self.csv_path)
+        try:
+            if sys.platform == "win32":
+                os.startfile(folder)  # type: ignore[attr-defined]
+            elif sys.platform == "darwin":
+                import subprocess
+
+                subprocess.run(["open", folder], check=False)
+            else:
+                import subprocess
+
+                subprocess.run(["xdg-open", folder], check=False)
+        except Exception:
+            messagebox.showinfo("Open folder", folder)
+
+    def show_help(self) -> None:
+        message = (
+            "How to use:\n"
+            "1) Click 'Open CSV…' and select your teacher list CSV.\n"
+            "   'Merge Files…' combines several files and finds duplicate teachers.\n"
+            "2) Use the Search box to find by name/department/phone.\n"
+            "   Narrow it with fields: dept:physics designation:\"assistant prof\" -retired phone:0171*\n"
+            "3) Click a column header to sort.\n"
+            "4) Select a row, then use 'Copy Phone' or 'Copy Row'.\n\n"
+            "CSV format tips:\n"
+            "- First row should be headers (e.g., Name, Department, Phone, Email).\n"
+            "- Works with comma/semicolon/tab separated files.\n"
+        )
+        messagebox.showinfo("Help", message)
+
+    def _show_context_menu(self, event: tk.Event) -> None:
+        row_id = self.tree.identify_row(event.y)
+        col_id = self.tree.identify_column(event.x)
+        if row_id:
+            self.tree.selection_set(row_id)
+            self.tree.focus(row_id)
+            self._selected_index = int(row_id)
+        self._context_item = row_id or None
+        self._context_column = col_id or None
+
+        menu = tk.Menu(self, tearoff=False)
+        menu.add_command(label="Copy Phone", command=self.copy_phone, state="normal" if self.phone_column else "disabled")
+        menu.add_command(label="Copy Row", command=self.copy_row, state="normal" if self._selected_record() else "disabled")
+
+        cell_state = "normal" if (self._selected_record() and self._context_column) else "disabled"
+        menu.add_command(label="Copy Cell", command=self._copy_context_cell, state=cell_state)
+
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    def _copy_context_cell(self) -> None:
+        record = self._selected_record()
+        if not record or not self._context_column:
+            return
+        try:
+            col_index = int(self._context_column.replace("#", "")) - 1
+        except Exception:
+            return
+        if col_index < 0 or col_index >= len(self.columns):
+            return
+        col = self.columns[col_index]
+        value = record.get(col, "")
+        self.clipboard_clear()
+        self.clipboard_append(value)
+        self._refresh_status(f"Copied {col}.")
@@ -0,0 +1,330 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from email.utils import formatdate
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from phonebook import (
+    ALL_COLUMNS,
+    RecordSearchIndex,
+    RecordTable,
+    SortCache,
+    SortState,
+    build_search_index,
+    file_stamp,
+    filter_records,
+    load_records,
+)
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+KEEPALIVE_TIMEOUT = 15.0
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 16 * 1024
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+SEARCH_PATH = "/api/search"
+SEARCH_CACHE_SIZE = 256
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 1000
+
+
+@dataclass
+class Representation:
+    body: bytes
+    etag: str
+
+
+@dataclass
+class Resource:
+    content_type: str
+    variants: dict[str, Representation]
+    stamp: tuple[int, int] | None = None
+
+
+def make_resource(
+    body: bytes,
+    content_type: str,
+    precompressed: dict[str, bytes] | None = None,
+    stamp: tuple[int, int] | None = None,
+) -> Resource:
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    variants = {"identity": Representation(body, f'"{digest}"')}
+    for encoding, data in (precompressed or {}).items():
+        variants[encoding] = Representation(data, f'"{digest}-{encoding}"')
+    if "gzip" not in variants and len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+        variants["gzip"] = Representation(gzip.compress(body, compresslevel=6, mtime=0), f'"{digest}-gzip"')
+    return Resource(content_type, variants, stamp)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        name, _sep, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _sep, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        name = name.strip().lower()
+        if name and quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _content_type(path: Path) -> str:
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+class StaticFiles:
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        self._cache: dict[Path, Resource] = {}
+
+    def resolve(self, url_path: str) -> Path | None:
+        candidate = (self.root / unquote(url_path).lstrip("/")).resolve()
+        if candidate != self.root and self.root not in candidate.parents:
+            return None
+        if candidate.is_dir():
+            candidate = candidate / "index.html"
+        return candidate if candidate.is_file() else None
+
+    async def get(self, url_path: str) -> Resource | None:
+        path = self.resolve(url_path)
+        if path is None:
+            return None
+        stamp = file_stamp(str(path))
+        cached = self._cache.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        resource = await asyncio.to_thread(self._read, path, stamp)
+        self._cache[path] = resource
+        return resource
+
+    def _read(self, path: Path, stamp: tuple[int, int] | None) -> Resource:
+        body = path.read_bytes()
+        precompressed: dict[str, bytes] = {}
+        for encoding, suffix in PRECOMPRESSED:
+            sibling = path.with_name(path.name + suffix)
+            sibling_stamp = file_stamp(str(sibling))
+            if stamp and sibling_stamp and sibling_stamp[1] >= stamp[1]:
+                precompressed[encoding] = sibling.read_bytes()
+        return make_resource(body, _content_type(path), precompressed, stamp)
+
+
+class SearchService:
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self.stamp: tuple[int, int] | None = None
+        self.columns: list[str] = []
+        self.records: RecordTable | None = None
+        self.index: RecordSearchIndex | None = None
+        self.sort_cache: SortCache | None = None
+        self.cache: OrderedDict[tuple, Resource] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def _reload(self, stamp: tuple[int, int]) -> None:
+        columns, records, phone_column = load_records(self.path)
+        self.columns = columns
+        self.records = records
+        self.index = build_search_index(records, phone_column)
+        self.sort_cache = SortCache(records)
+        self.cache.clear()
+        self.stamp = stamp
+
+    def _search(self, key: tuple) -> Resource:
+        text, column, sort, reverse, fuzzy, limit = key
+        view = filter_records(
+            self.records,
+            self.index,
+            self.sort_cache,
+            text,
+            column,
+            SortState(column=sort, reverse=reverse) if sort else None,
+            fuzzy,
+        )
+        rows = [dict(zip(self.columns, view.row_values(idx))) for idx in range(min(limit, len(view)))]
+        payload = {"count": len(view), "columns": self.columns, "records": rows}
+        return make_resource(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    async def search(self, query: str) -> tuple[HTTPStatus, Resource | str]:
+        params = parse_qs(query)
+
+        def param(name: str, default: str = "") -> str:
+            return params.get(name, [default])[0]
+
+        try:
+            limit = min(max(int(param("limit", str(SEARCH_DEFAULT_LIMIT))), 0), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, "limit must be an integer"
+
+        async with self._lock:
+            stamp = file_stamp(self.path) if self.path else None
+            if stamp is None:
+                return HTTPStatus.SERVICE_UNAVAILABLE, "No data file found."
+            if stamp != self.stamp:
+                try:
+                    await asyncio.to_thread(self._reload, stamp)
+                except Exception as e:
+                    return HTTPStatus.SERVICE_UNAVAILABLE, f"Could not load {self.path}: {e}"
+
+            column = param("column", ALL_COLUMNS)
+            sort = param("sort") or None
+            if column != ALL_COLUMNS and column not in self.columns:
+                return HTTPStatus.BAD_REQUEST, f"Unknown column: {column}"
+            if sort and sort not in self.columns:
+                return HTTPStatus.BAD_REQUEST, f"Unknown sort column: {sort}"
+
+            key = (param("q"), column, sort, param("desc") in ("1", "true"), param("fuzzy") in ("1", "true"), limit)
+            resource = self.cache.get(key)
+            if resource is None:
+                resource = await asyncio.to_thread(self._search, key)
+                self.cache[key] = resource
+                if len(self.cache) > SEARCH_CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            else:
+                self.cache.move_to_end(key)
+            return HTTPStatus.OK, resource
+
+
+def _parse_head(head: bytes) -> tuple[str, str, str, dict[str, str]] | None:
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        return None
+    if not version.startswith("HTTP/1."):
+        return None
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            return None
+        name = name.strip().lower()
+        headers[name] = f"{headers[name]}, {value.strip()}" if name in headers else value.strip()
+    return method, target, version, headers
+
+
+class PhoneBookServer:
+    def __init__(self, root: Path, data_path: str | None) -> None:
+        self.static = StaticFiles(root)
+        self.search = SearchService(data_path)
+
+    async def respond(
+        self, method: str, target: str, headers: dict[str, str]
+    ) -> tuple[HTTPStatus, list[tuple[str, str]], bytes]:
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, [("Allow", "GET, HEAD")], b""
+
+        url = urlsplit(target)
+        if url.path == SEARCH_PATH:
+            status, resource = await self.search.search(url.query)
+        else:
+            resource = await self.static.get(url.path)
+            status = HTTPStatus.OK if resource is not None else HTTPStatus.NOT_FOUND
+        if not isinstance(resource, Resource):
+            message = json.dumps({"error": resource or status.phrase}).encode("utf-8")
+            return status, [("Content-Type", "application/json; charset=utf-8")], message
+
+        encoding = "identity"
+        accepted = accepted_encodings(headers.get("accept-encoding", ""))
+        for candidate in ("br", "gzip"):
+            if candidate in accepted and candidate in resource.variants:
+                encoding = candidate
+                break
+        representation = resource.variants[encoding]
+        response_headers = [("ETag", representation.etag), ("Cache-Control", "no-cache")]
+        if len(resource.variants) > 1:
+            response_headers.append(("Vary", "Accept-Encoding"))
+        if etag_matches(headers.get("if-none-match", ""), representation.etag):
+            return HTTPStatus.NOT_MODIFIED, response_headers, b""
+
+        response_headers.append(("Content-Type", resource.content_type))
+        if encoding != "identity":
+            response_headers.append(("Content-Encoding", encoding))
+        return status, response_headers, representation.body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request = _parse_head(head[:-4])
+                if request is None:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                method, target, version, headers = request
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                # Only GET and HEAD are served, so a body is never used; refuse to buffer a large one.
+                if int(length) > MAX_BODY_BYTES:
+                    writer.write(b"HTTP/1.1 413 Content Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if int(length):
+                    await reader.readexactly(int(length))
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = "close" not in connection
+                else:
+                    keep_alive = "keep-alive" in connection
+
+                status, response_headers, body = await self.respond(method, target, headers)
+                lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {formatdate(usegmt=True)}"]
+                lines += [f"{name}: {value}" for name, value in response_headers]
+                if status != HTTPStatus.NOT_MODIFIED:
+                    lines.append(f"Content-Length: {len(body)}")
+                lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+                if keep_alive:
+                    lines.append(f"Keep-Alive: timeout={int(KEEPALIVE_TIMEOUT)}")
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+
+async def serve(root: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, data_path: str | None = None) -> None:
+    app = PhoneBookServer(Path(root), data_path)
+    server = await asyncio.start_server(app.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Serving {root} on http://{host}:{port}/ (search API: {SEARCH_PATH})", flush=True)
+    if not data_path:
+        print("No data file found; the search API will answer 503.", flush=True)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import read_csv_mapped, read_csv_records  # noqa: E402
+
+CONTENTS = {
+    "trailing_newline": "Name,Phone\nRahim,01711234567\nKarim,01811234567\n",
+    "no_trailing_newline": "Name,Phone\nRahim,01711234567\nKarim,01811234567",
+    "crlf": "Name,Phone\r\nRahim,01711234567\r\nKarim,01811234567\r\n",
+    "quoted_last_row": 'Name,Phone\nRahim,01711234567\n"Uddin, Karim",01811234567',
+    "short_last_row": "Name,Department,Phone\nRahim,Physics,01711234567\nKarim",
+}
+
+
+@pytest.mark.parametrize("name", sorted(CONTENTS))
+def test_mapped_rows_match_parsed_rows(tmp_path: Path, name: str) -> None:
+    path = tmp_path / f"{name}.csv"
+    path.write_bytes(CONTENTS[name].encode("utf-8"))
+    headers, parsed = read_csv_records(str(path))
+    mapped_headers, mapped = read_csv_mapped(str(path))
+    assert mapped_headers == headers
+    assert len(mapped) == len(parsed)
+    for row_id in range(len(parsed)):
+        assert mapped.row_values(row_id) == parsed.row_values(row_id)
@@ -0,0 +1,48 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import RecordTable, merge_duplicates, write_vcards  # noqa: E402
+
+COLUMNS = ["Name", "Department", "Designation", "Phone", "Email", "Source"]
+
+
+def _duplicates() -> RecordTable:
+    table = RecordTable(COLUMNS)
+    table.append(["Md. Rahim Uddin", "Physics", "Asst. Prof.", "01711-234567", "rahim@example.com", "a.csv"])
+    table.append(["Mohammad Rahim Uddin", "physics", "Assistant Professor", "+8801711234567", "", "b.csv"])
+    table.append(["Rahim Uddin", "Physics", "", "01811111111", "r.uddin@example.com", "b.csv"])
+    table.append(["Karim Miah", "Botany", "Lecturer", "01911111111", "", "a.csv"])
+    return table
+
+
+def test_scalar_columns_keep_one_value_and_contacts_are_joined() -> None:
+    merged = merge_duplicates(_duplicates(), [[0, 1, 2]], "Phone")
+    assert len(merged) == 2
+    assert merged.row_values(0) == [
+        "Mohammad Rahim Uddin",
+        "Physics",
+        "Assistant Professor",
+        "01711-234567 / 01811111111",
+        "rahim@example.com / r.uddin@example.com",
+        "a.csv / b.csv",
+    ]
+    assert merged.row_values(1) == ["Karim Miah", "Botany", "Lecturer", "01911111111", "", "a.csv"]
+
+
+def test_vcard_of_merged_row_lists_each_phone_and_email() -> None:
+    merged = merge_duplicates(_duplicates(), [[0, 1, 2]], "Phone")
+    out = io.StringIO()
+    write_vcards(out, COLUMNS, merged.view([0]), "Phone")
+    lines = out.getvalue().split("\r\n")
+    assert "FN:Mohammad Rahim Uddin" in lines
+    assert [line for line in lines if line.startswith("TEL")] == [
+        "TEL;TYPE=CELL:01711-234567",
+        "TEL;TYPE=CELL:01811111111",
+    ]
+    assert [line for line in lines if line.startswith("EMAIL")] == [
+        "EMAIL;TYPE=INTERNET:rahim@example.com",
+        "EMAIL;TYPE=INTERNET:r.uddin@example.com",
+    ]
@@ -0,0 +1,235 @@
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+
+from phonebook import (  # noqa: E402
+    QueryAnd,
+    QueryNot,
+    QueryOr,
+    QueryTerm,
+    RecordSearchIndex,
+    RecordTable,
+    SortCache,
+    canonical_phone,
+    filter_records,
+    guess_phone_column,
+    parse_query,
+    phone_query,
+    plan_query,
+    structured_query,
+)
+from synthetic_phonebook import HEADERS, generate_rows  # noqa: E402
+
+ROWS = 3000
+FIELD_COLUMNS = {
+    "name": "Name",
+    "dept": "Department",
+    "department": "Department",
+    "designation": "Designation",
+    "phone": "Phone",
+    "email": "Email",
+}
+WORD_START = r"(?:^|[\s.,;:()/\-])"
+PLAIN_QUERIES = [
+    "(",
+    ")",
+    "()",
+    '"',
+    '""',
+    "*",
+    "dept:",
+    "name:",
+    "phone:",
+    "n:rah",
+    "x:y",
+    "10:30",
+    "political science",
+    "political science (",
+    "(political science",
+    "science)",
+    "md. rah",
+    "a b",
+    "rahman",
+]
+QUERIES = [
+    'dept:physics designation:"assistant prof" -rahman phone:017*',
+    "dept:mathematics",
+    "dept:math*",
+    "name:rahim OR name:karim",
+    "(dept:physics | dept:chemistry) -phone:017*",
+    "designation:প্রভা*",
+    "NOT dept:physics",
+    "dept:bot* 018",
+    "email:example -dept:physics",
+    "phone:01711*",
+    "phone:+880*",
+    "phone:880*",
+    "phone:+8801711*",
+    "phone:8801*",
+    "+8801711*",
+    "phone:1711",
+    "name:md* designation:lecturer",
+    '"assistant professor" -name:uddin',
+    "unknown:value",
+    "(name:rahim",
+    "name:rahim)",
+    "dept:",
+]
+
+
+@pytest.fixture(scope="module")
+def phonebook() -> tuple[RecordTable, RecordSearchIndex]:
+    table = RecordTable(HEADERS)
+    for row in generate_rows(ROWS, 7):
+        table.append(row)
+    return table, RecordSearchIndex(table, guess_phone_column(table.columns, table))
+
+
+def test_parse_query() -> None:
+    assert parse_query('dept:physics designation:"assistant prof" -retired phone:0171*') == QueryAnd(
+        [
+            QueryTerm("dept", "physics"),
+            QueryTerm("designation", "assistant prof", quoted=True),
+            QueryNot(QueryTerm(None, "retired")),
+            QueryTerm("phone", "0171", prefix=True),
+        ]
+    )
+    assert parse_query("a OR b | c") == QueryOr([QueryTerm(None, "a"), QueryTerm(None, "b"), QueryTerm(None, "c")])
+    assert parse_query("(a | b) NOT c") == QueryAnd(
+        [QueryOr([QueryTerm(None, "a"), QueryTerm(None, "b")]), QueryNot(QueryTerm(None, "c"))]
+    )
+    assert parse_query("(a b") == QueryAnd([QueryTerm(None, "a"), QueryTerm(None, "b")])
+    assert parse_query("a) b") == QueryAnd([QueryTerm(None, "a"), QueryTerm(None, "b")])
+    assert parse_query("dept:") == QueryAnd([])
+
+
+def _phone_digits(digits: str, prefix: bool) -> str:
+    if digits.startswith("880") and (prefix or len(digits) > 4):
+        return "0" + digits[3:]
+    return digits
+
+
+def _term_matches(term: QueryTerm, row: dict[str, str]) -> bool:
+    # Written against the documented query semantics, not against the planner's code.
+    text = term.text.lower()
+    column = FIELD_COLUMNS.get(term.field.casefold()) if term.field else None
+    if term.field and column is None:
+        text = f"{term.field}:{term.text}".lower()
+
+    def contains(value: str) -> bool:
+        value = value.lower()
+        return bool(re.search(WORD_START + re.escape(text), value)) if term.prefix else text in value
+
+    def phone_matches(digits: str) -> bool:
+        phone = canonical_phone(row["Phone"])
+        digits = _phone_digits(digits, term.prefix)
+        return phone.startswith(digits) if term.prefix else digits in phone
+
+    if column == "Phone":
+        digits = re.sub(r"\D", "", text)
+        return phone_matches(digits) if digits else contains(row["Phone"])
+    if column is not None:
+        return contains(row[column])
+    digits = phone_query(text)
+    return any(contains(value) for value in row.values()) or bool(digits and phone_matches(digits))
+
+
+def _evaluate(node: object, row: dict[str, str]) -> bool:
+    if isinstance(node, QueryTerm):
+        return _term_matches(node, row)
+    if isinstance(node, QueryNot):
+        return not _evaluate(node.child, row)
+    if isinstance(node, QueryOr):
+        return any(_evaluate(child, row) for child in node.children)
+    assert isinstance(node, QueryAnd)
+    return all(_evaluate(child, row) for child in node.children)
+
+
+def _reference(table: RecordTable, query: str) -> list[int]:
+    node = parse_query(query)
+    return [row_id for row_id in range(len(table)) if _evaluate(node, dict(zip(HEADERS, table.row_values(row_id))))]
+
+
+def _random_term(rng: random.Random, table: RecordTable) -> str:
+    value = rng.choice(table.row_values(rng.randrange(len(table)))).lower() or "a"
+    start = rng.randrange(len(value))
+    text = value[start : start + rng.randint(1, 6)].replace('"', "")
+    field = rng.choice(["name", "dept", "designation", "phone", "email", "foo", None, None])
+    star = "*" if rng.random() < 0.3 else ""
+    if text.isalnum() and text.upper() not in ("OR", "AND", "NOT") and rng.random() < 0.5:
+        term = f"{text}{star}"
+    else:
+        term = f'"{text}{star}"'
+    return ("-" if rng.random() < 0.2 else "") + (f"{field}:" if field else "") + term
+
+
+def test_which_queries_are_structured(phonebook: tuple[RecordTable, RecordSearchIndex]) -> None:
+    table, _index = phonebook
+    for query in PLAIN_QUERIES + ["md rahman", "01711-234"]:
+        assert structured_query(query, table) is None, query
+    for query in ("dept:physics", "Department:physics", '"md rahman"', "rah*", "a OR b", "-rahman", "(a b)"):
+        assert structured_query(query, table) is not None, query
+
+
+@pytest.mark.parametrize("query", PLAIN_QUERIES)
+def test_plain_text_keeps_substring_search(phonebook: tuple[RecordTable, RecordSearchIndex], query: str) -> None:
+    table, index = phonebook
+    joined = [" ".join(table.row_values(row_id)).lower() for row_id in range(len(table))]
+    phones = [canonical_phone(value) for value in table.column("Phone")]
+    digits = phone_query(query)
+    expected = [
+        row_id
+        for row_id, text in enumerate(joined)
+        if query.lower() in text or (digits and digits in phones[row_id])
+    ]
+    view = filter_records(table, index, SortCache(table), query)
+    assert [view.row_values(pos) for pos in range(len(view))] == [table.row_values(row_id) for row_id in expected]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_plan_matches_reference_evaluation(phonebook: tuple[RecordTable, RecordSearchIndex], query: str) -> None:
+    table, index = phonebook
+    expected = _reference(table, query)
+    plan = plan_query(parse_query(query), table, index)
+    assert plan.search() == expected
+    assert [row_id for row_id in range(len(table)) if plan.matches(row_id)] == expected
+
+
+def test_random_queries_match_reference_evaluation(phonebook: tuple[RecordTable, RecordSearchIndex]) -> None:
+    table, index = phonebook
+    rng = random.Random(7)
+    for _ in range(200):
+        groups = []
+        for _ in range(rng.randint(1, 3)):
+            terms = " ".join(_random_term(rng, table) for _ in range(rng.randint(1, 2)))
+            groups.append(f"({terms})" if rng.random() < 0.3 else terms)
+        query = (" OR " if rng.random() < 0.3 else " ").join(groups)
+        assert plan_query(parse_query(query), table, index).search() == _reference(table, query), query
+
+
+def test_phone_prefix_with_country_code(phonebook: tuple[RecordTable, RecordSearchIndex]) -> None:
+    table, index = phonebook
+    phones = [canonical_phone(value) for value in table.column("Phone")]
+    with_zero = [row_id for row_id, phone in enumerate(phones) if phone.startswith("0")]
+    assert with_zero
+    for query in ("phone:0*", "phone:880*", "phone:+880*", '"+880*"'):
+        assert plan_query(parse_query(query), table, index).search() == with_zero, query
+
+    starts_01711 = [row_id for row_id, phone in enumerate(phones) if phone.startswith("01711")]
+    for query in ("phone:01711*", "phone:8801711*", "phone:+880-1711*", "+8801711*"):
+        assert plan_query(parse_query(query), table, index).search() == starts_01711, query
+
+
+def test_filter_records_uses_plan_for_structured_queries(phonebook: tuple[RecordTable, RecordSearchIndex]) -> None:
+    table, index = phonebook
+    view = filter_records(table, index, SortCache(table), "dept:physics -designation:lecturer")
+    rows = [view.row_values(pos) for pos in range(len(view))]
+    assert rows
+    assert all("physics" in row[1].lower() and "lecturer" not in row[2].lower() for row in rows)
+    assert len(filter_records(table, index, SortCache(table), "physics")) > len(view)
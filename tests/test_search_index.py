@@ -0,0 +1,94 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+
+from search_index import (  # noqa: E402
+    SearchIndex,
+    build_index,
+    record_phones,
+    record_text,
+    scan_prefix_search,
+    scan_search,
+    tokenize,
+)
+from synthetic_phonebook import HEADERS, generate_rows  # noqa: E402
+
+SEEDS = [1, 2, 3]
+ROWS = 1500
+FIXED_QUERIES = [
+    "",
+    "a",
+    "r",
+    "ra",
+    "md",
+    "e",
+    ".com",
+    "example.com",
+    "com",
+    "ssor",
+    "assistant professor",
+    "physics",
+    "বিভাগ",
+    "রহ",
+    "0171",
+    "01711",
+    "+880",
+    "+880 17",
+    "880171",
+    "+880 1711-23",
+    "017",
+    "1",
+    "nomatchatall",
+]
+FIXED_PREFIXES = ["", "r", "ra", "rah", "md", "md.", "mohammad rah", "ass prof", "e", "ex", "বি", "zzz", "+880", "01"]
+
+
+def _records(seed: int) -> list[dict[str, str]]:
+    return [dict(zip(HEADERS, row)) for row in generate_rows(ROWS, seed)]
+
+
+@pytest.fixture(scope="module", params=SEEDS)
+def corpus(request: pytest.FixtureRequest) -> tuple[int, SearchIndex, list[str], list[str]]:
+    records = _records(request.param)
+    texts = [record_text(HEADERS, record) for record in records]
+    _columns, phones = record_phones(HEADERS, records)
+    return request.param, SearchIndex(build_index(HEADERS, records)), texts, phones
+
+
+def _random_queries(rng: random.Random, texts: list[str], phones: list[str], count: int) -> list[str]:
+    queries = []
+    for _ in range(count):
+        source = rng.choice(texts + [phone for phone in phones if phone])
+        start = rng.randrange(len(source))
+        queries.append(source[start : start + rng.randint(1, 8)])
+    return queries
+
+
+def test_search_matches_scan(corpus: tuple[int, SearchIndex, list[str], list[str]]) -> None:
+    seed, index, texts, phones = corpus
+    rng = random.Random(seed)
+    for query in FIXED_QUERIES + _random_queries(rng, texts, phones, 200):
+        assert index.search(texts, query) == scan_search(texts, phones, query), query
+
+
+def test_common_grams_are_exercised(corpus: tuple[int, SearchIndex, list[str], list[str]]) -> None:
+    _seed, index, texts, phones = corpus
+    assert index.common_grams
+    for gram in sorted(index.common_grams):
+        assert index.search(texts, gram) == scan_search(texts, phones, gram), gram
+
+
+def test_prefix_search_matches_scan(corpus: tuple[int, SearchIndex, list[str], list[str]]) -> None:
+    seed, index, texts, _phones = corpus
+    rng = random.Random(seed)
+    queries = list(FIXED_PREFIXES)
+    for _ in range(200):
+        tokens = tokenize(rng.choice(texts))
+        picked = rng.sample(tokens, min(len(tokens), rng.randint(1, 3)))
+        queries.append(" ".join(token[: rng.randint(1, len(token))] for token in picked))
+    for query in queries:
+        assert index.prefix_search(query) == scan_prefix_search(texts, query), query
@@ -0,0 +1,54 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import phonebook  # noqa: E402
+from phonebook import load_records, load_snapshot  # noqa: E402
+
+CONTENT = "Name,Phone\nRahim,01711234567\nKarim,01811234567\n"
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(phonebook, "SNAPSHOT_DIR", str(cache))
+    return cache
+
+
+def test_snapshot_round_trip(tmp_path: Path, cache_dir: Path) -> None:
+    path = tmp_path / "teachers.csv"
+    path.write_text(CONTENT, encoding="utf-8")
+    headers, table, phone_column = load_records(str(path))
+    assert len(list(cache_dir.glob("*.snap"))) == 1
+
+    snapshot = load_snapshot(str(path))
+    assert snapshot is not None
+    assert snapshot[0] == headers
+    assert snapshot[2] == phone_column
+    assert [snapshot[1].row_values(row_id) for row_id in range(len(table))] == [
+        table.row_values(row_id) for row_id in range(len(table))
+    ]
+
+
+def test_same_size_rewrite_with_same_mtime_is_a_miss(tmp_path: Path, cache_dir: Path) -> None:
+    path = tmp_path / "teachers.csv"
+    path.write_text(CONTENT, encoding="utf-8")
+    load_records(str(path))
+    stat = path.stat()
+    path.write_text(CONTENT.replace("Rahim", "Rahin"), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_snapshot(str(path)) is None
+
+
+def test_snapshot_larger_than_the_cache_is_not_written(
+    tmp_path: Path, cache_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(phonebook, "SNAPSHOT_CACHE_LIMIT", 16)
+    path = tmp_path / "teachers.csv"
+    path.write_text(CONTENT, encoding="utf-8")
+    load_records(str(path))
+    assert not cache_dir.exists()
@@ -0,0 +1,77 @@
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import RecordTable, export_records, read_xlsx_records  # noqa: E402
+
+openpyxl = pytest.importorskip("openpyxl")
+
+ROWS = [
+    ["Name", "Department", "Phone"],
+    ["Rahim Uddin", "Physics", "01711234567"],
+    ["Karim", None, "01811234567"],
+    ["Nusrat", "Chemistry"],
+]
+
+
+def _write_workbook(path: Path, rows: list[list]) -> None:
+    wb = openpyxl.Workbook()
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+
+
+def _with_dimension(src_path: Path, dst_path: Path, ref: str) -> None:
+    with zipfile.ZipFile(src_path) as src, zipfile.ZipFile(dst_path, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb'<dimension ref="[^"]*" ?/>', f'<dimension ref="{ref}"/>'.encode(), data)
+            dst.writestr(item, data)
+
+
+def test_wrong_stored_dimension_does_not_truncate_rows(tmp_path: Path) -> None:
+    good = tmp_path / "good.xlsx"
+    bad = tmp_path / "bad.xlsx"
+    _write_workbook(good, ROWS)
+    _with_dimension(good, bad, "A1:A1")
+
+    expected = [["Rahim Uddin", "Physics", "01711234567"], ["Karim", "", "01811234567"], ["Nusrat", "Chemistry", ""]]
+    for path in (good, bad):
+        headers, table = read_xlsx_records(str(path))
+        assert headers == ["Name", "Department", "Phone"]
+        assert [table.row_values(row_id) for row_id in range(len(table))] == expected
+
+
+def test_csv_packed_in_one_column(tmp_path: Path) -> None:
+    path = tmp_path / "packed.xlsx"
+    _write_workbook(path, [["Name,Phone"], ["Rahim,01711234567"], ["Karim,01811234567"]])
+    headers, table = read_xlsx_records(str(path))
+    assert headers == ["Name", "Phone"]
+    assert table.row_values(1) == ["Karim", "01811234567"]
+
+
+def test_export_round_trip_keeps_formula_like_text(tmp_path: Path) -> None:
+    columns = ["Name", "Phone", "=Note"]
+    rows = [
+        ["Rahim Uddin", "+8801711234567", "=HYPERLINK(\"http://example.com\")"],
+        ["রহিম উদ্দিন", "01711-234567", "=1+2"],
+        ["Karim", "", "plain"],
+    ]
+    table = RecordTable(columns)
+    for row in rows:
+        table.append(row)
+    path = tmp_path / "export.xlsx"
+    export_records(str(path), columns, table.view())
+
+    headers, loaded = read_xlsx_records(str(path))
+    assert headers == columns
+    assert [loaded.row_values(row_id) for row_id in range(len(loaded))] == rows
+
+    ws = openpyxl.load_workbook(path).active
+    assert all(cell.data_type != "f" for row in ws.iter_rows() for cell in row)
@@ -0,0 +1,192 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import (  # noqa: E402
+    RecordSearchIndex,
+    SortCache,
+    SortState,
+    export_records,
+    filter_records,
+    guess_phone_column,
+    build_search_index,
+    parse_query,
+    plan_query,
+    read_csv_mapped,
+    read_csv_records,
+    read_xlsx_records,
+)
+from synthetic_phonebook import write_phonebook  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+TYPING_QUERIES = ["r", "ra", "rah", "rahm", "rahma", "rahman"]
+STRUCTURED_QUERY = 'dept:physics designation:"assistant prof" -rahman phone:017*'
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark loading, searching, sorting and exporting phone books")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to benchmark")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic data (default: 1)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file (default: bench_results.json)")
+    parser.add_argument("--no-xlsx", action="store_true", help="Skip the .xlsx readers")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+    return parser.parse_args(argv)
+
+
+def _git_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def forget_queries(index: RecordSearchIndex) -> None:
+    # The index remembers recent queries and built fuzzy indexes; each measured run starts without them.
+    index._history.clear()
+    index._fuzzy.clear()
+
+
+def measure(
+    fn: Callable[[], Any], track_memory: bool, reset: Callable[[], None] | None = None
+) -> tuple[float, int | None, Any]:
+    if reset is not None:
+        reset()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+
+    peak: int | None = None
+    if track_memory:
+        if reset is not None:
+            reset()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def run_size(rows: int, args: argparse.Namespace, tmp: Path, results: list[dict[str, Any]]) -> None:
+    track_memory = not args.no_memory
+
+    def record(
+        name: str, fn: Callable[[], Any], items: int = rows, reset: Callable[[], None] | None = None
+    ) -> Any:
+        elapsed, peak, result = measure(fn, track_memory, reset)
+        results.append(
+            {
+                "name": name,
+                "rows": rows,
+                "seconds": round(elapsed, 6),
+                "rows_per_second": round(items / elapsed) if elapsed > 0 else None,
+                "peak_bytes": peak,
+            }
+        )
+        peak_text = f"{peak / 1024 / 1024:8.1f} MiB" if peak is not None else "       -"
+        print(f"{rows:>9} {name:<28} {elapsed:9.4f} s {peak_text}")
+        return result
+
+    csv_path = tmp / f"phonebook_{rows}.csv"
+    semicolon_path = tmp / f"phonebook_{rows}_semicolon.csv"
+    write_phonebook(csv_path, rows, "csv", args.seed)
+    write_phonebook(semicolon_path, rows, "semicolon", args.seed)
+
+    headers, table = record("read_csv_records", lambda: read_csv_records(str(csv_path)))
+    record("read_csv_records[semicolon]", lambda: read_csv_records(str(semicolon_path)))
+    _mapped_headers, mapped = record("read_csv_mapped", lambda: read_csv_mapped(str(csv_path)))
+    mapped_index = build_search_index(mapped)
+    record(
+        "filter[mapped, all columns]",
+        lambda: len(filter_records(mapped, mapped_index, None, "physics")),
+        reset=lambda: forget_queries(mapped_index),
+    )
+
+    if not args.no_xlsx:
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            print("openpyxl is not installed; skipping .xlsx benchmarks.")
+        else:
+            for fmt in ("xlsx", "xlsx-packed"):
+                xlsx_path = tmp / f"phonebook_{rows}_{fmt}.xlsx"
+                write_phonebook(xlsx_path, rows, fmt, args.seed)
+                record(f"read_xlsx_records[{fmt}]", lambda p=xlsx_path: read_xlsx_records(str(p)))
+
+    record("guess_phone_column", lambda: guess_phone_column(headers, table))
+    index = record("search_index_build", lambda: RecordSearchIndex(table))
+
+    def fresh() -> None:
+        forget_queries(index)
+
+    def typing_session() -> int:
+        matched = 0
+        for query in TYPING_QUERIES:
+            matched = len(filter_records(table, index, None, query))
+        return matched
+
+    record("filter[all columns]", lambda: len(filter_records(table, index, None, "physics")), reset=fresh)
+    record("filter[column]", lambda: len(filter_records(table, index, None, "lect", "Designation")), reset=fresh)
+    record("filter[typing session]", typing_session, rows * len(TYPING_QUERIES), reset=fresh)
+    record(
+        "filter[fuzzy]",
+        lambda: len(filter_records(table, index, None, "muhammad rahaman", fuzzy=True)),
+        reset=fresh,
+    )
+    plan = plan_query(parse_query(STRUCTURED_QUERY), table, index)
+    record("query[planned]", lambda: len(plan.search()))
+    record("query[naive]", lambda: sum(1 for row_id in range(len(table)) if plan.matches(row_id)))
+
+    record("sort[cold]", lambda: SortCache(table).sorted_records(None, "Name", False))
+    cache = SortCache(table)
+    cache.sorted_records(None, "Name", False)
+    record(
+        "sort[filtered, cached]",
+        lambda: filter_records(table, index, cache, "a", sort_state=SortState(column="Name", reverse=False)),
+        reset=fresh,
+    )
+
+    for ext in (".csv", ".jsonl", ".vcf"):
+        path = tmp / f"export_{rows}{ext}"
+        record(f"export_records[{ext}]", lambda p=path: export_records(str(p), headers, table.view()))
+
+
+def main() -> int:
+    args = parse_args()
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            run_size(rows, args, Path(tmp), results)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,28 @@
 import argparse
 import csv
+import gzip
+import hashlib
 import json
+import re
+import sys
+import time
 from datetime import datetime, timezone
 from io import StringIO
 from pathlib import Path
 
 import openpyxl
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import canonical_phone, guess_phone_column  # noqa: E402
+from search_index import build_index  # noqa: E402
+
+COLUMNAR_FORMAT = "columnar"
+DELTA_FORMAT = "phonebook-delta"
+DICTIONARY_MAX_RATIO = 0.5
+DEFAULT_FIRST_PAGE = 100
+PARSE_SAMPLES = 5
+
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate mobile/phonebook_data.js from PhoneBook.xlsx")
@@ -21,6 +37,58 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Sheet name to read (default: first sheet)",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write minified columnar data with dictionary-encoded repeated values",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=0,
+        help="Split the records after the first page into lazily loaded files of N records (implies --compact)",
+    )
+    parser.add_argument(
+        "--first-page",
+        type=int,
+        default=DEFAULT_FIRST_PAGE,
+        help=f"Records kept in the main file when sharding (default: {DEFAULT_FIRST_PAGE})",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Also write precompressed .gz (and .br when the brotli module is installed) siblings",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not write the prebuilt search index next to the data file",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Write nothing; exit with status 1 if the output is missing or out of date",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rewrite the output even when its content hash is unchanged",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Also write <output>_delta.json with the records added, changed and removed since the previous output",
+    )
+    parser.add_argument(
+        "--id-column",
+        default=None,
+        help="Column that identifies a teacher in delta files (default: canonical phone number)",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Print output size and parse-time estimates for each mode",
+    )
     return parser.parse_args(argv)
 
 
@@ -63,7 +131,7 @@ def parse_csv_lines(lines: list[str]) -> tuple[list[str], list[dict[str, str]]]:
     return headers, records
 
 
-def generate_js(data: list[dict[str, str]], source_name: str) -> str:
+def generate_js(data: list[dict[str, str]], source_name: str, extra_meta: dict[str, object] | None = None) -> str:
     generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     payload = json.dumps(data, ensure_ascii=False, indent=2)
 
@@ -71,6 +139,7 @@ def generate_js(data: list[dict[str, str]], source_name: str) -> str:
         "generatedAt": generated_at,
         "source": source_name,
         "count": len(data),
+        **(extra_meta or {}),
     }
     meta_payload = json.dumps(meta, ensure_ascii=False, indent=2)
 
@@ -83,6 +152,250 @@ def generate_js(data: list[dict[str, str]], source_name: str) -> str:
     )
 
 
+def columnar_payload(headers: list[str], records: list[dict[str, str]]) -> dict:
+    columns: list[list] = []
+    dicts: list[list[str] | None] = []
+    for header in headers:
+        values = [record.get(header, "") for record in records]
+        distinct = list(dict.fromkeys(values))
+        if len(values) > 1 and len(distinct) <= len(values) * DICTIONARY_MAX_RATIO:
+            codes = {value: idx for idx, value in enumerate(distinct)}
+            columns.append([codes[value] for value in values])
+            dicts.append(distinct)
+        else:
+            columns.append(values)
+            dicts.append(None)
+    return {
+        "format": COLUMNAR_FORMAT,
+        "v": 1,
+        "headers": headers,
+        "dicts": dicts,
+        "columns": columns,
+        "count": len(records),
+    }
+
+
+def _minified(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def shard_names(output_path: Path, count: int) -> list[str]:
+    return [f"{output_path.stem}.{idx}{output_path.suffix}" for idx in range(1, count + 1)]
+
+
+def generate_compact_js(
+    headers: list[str],
+    records: list[dict[str, str]],
+    source_name: str,
+    total: int | None = None,
+    shards: list[str] | None = None,
+    extra_meta: dict[str, object] | None = None,
+) -> str:
+    generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    payload = columnar_payload(headers, records)
+    if shards:
+        payload["shards"] = shards
+    meta = {
+        "generatedAt": generated_at,
+        "source": source_name,
+        "count": len(records) if total is None else total,
+        **(extra_meta or {}),
+    }
+    return (
+        "// Auto-generated file. Regenerate with tools/generate_phonebook_data.py.\n"
+        f"// Source: {source_name}\n"
+        f"// Generated: {generated_at}\n"
+        f"window.PHONEBOOK_DATA={_minified(payload)};\n"
+        f"window.PHONEBOOK_META={_minified(meta)};\n"
+    )
+
+
+def index_name(output_path: Path) -> str:
+    return f"{output_path.stem}_index{output_path.suffix}"
+
+
+def generate_index_js(headers: list[str], records: list[dict[str, str]]) -> str:
+    return f"window.PHONEBOOK_INDEX={_minified(build_index(headers, records))};\n"
+
+
+def generate_shard_js(index: int, headers: list[str], records: list[dict[str, str]]) -> str:
+    return (
+        "window.PHONEBOOK_SHARDS=window.PHONEBOOK_SHARDS||{};\n"
+        f"window.PHONEBOOK_SHARDS[{index}]={_minified(columnar_payload(headers, records))};\n"
+    )
+
+
+def split_shards(
+    records: list[dict[str, str]], first_page: int, shard_size: int
+) -> tuple[list[dict[str, str]], list[list[dict[str, str]]]]:
+    first_page = max(1, first_page)
+    rest = records[first_page:]
+    return records[:first_page], [rest[idx : idx + shard_size] for idx in range(0, len(rest), shard_size)]
+
+
+def content_hash(headers: list[str], records: list[dict[str, str]]) -> str:
+    rows = [[record.get(header, "") for header in headers] for record in records]
+    return hashlib.sha256(_minified({"headers": headers, "records": rows}).encode("utf-8")).hexdigest()
+
+
+def output_layout(args: argparse.Namespace) -> str:
+    if args.shard_size > 0:
+        layout = f"sharded:{max(1, args.first_page)}:{args.shard_size}"
+    else:
+        layout = "compact" if args.compact else "pretty"
+    if not args.no_index:
+        layout += "+index"
+    return layout + "+compress" if args.compress else layout
+
+
+def _assigned_json(text: str, target: str) -> object:
+    start = text.rfind(target)
+    if start < 0:
+        raise ValueError(f"{target} not found")
+    value = text[start + len(target) :].lstrip()
+    if not value.startswith("="):
+        raise ValueError(f"{target} is not assigned")
+    value = value[1:].lstrip()
+    return json.JSONDecoder().raw_decode(value)[0]
+
+
+def decode_columnar(payload: dict) -> list[dict[str, str]]:
+    headers = payload["headers"]
+    columns = [
+        [dictionary[code] for code in column] if dictionary is not None else column
+        for column, dictionary in zip(payload["columns"], payload["dicts"])
+    ]
+    return [dict(zip(headers, values)) for values in zip(*columns)]
+
+
+def read_previous(output_path: Path) -> tuple[dict | None, list[dict[str, str]] | None]:
+    try:
+        text = output_path.read_text(encoding="utf-8")
+        meta = _assigned_json(text, "window.PHONEBOOK_META")
+        data = _assigned_json(text, "window.PHONEBOOK_DATA")
+    except (OSError, ValueError):
+        return None, None
+    if not isinstance(meta, dict):
+        meta = None
+    if isinstance(data, list):
+        return meta, data
+    if not isinstance(data, dict) or data.get("format") != COLUMNAR_FORMAT:
+        return meta, None
+
+    records = decode_columnar(data)
+    for idx, name in enumerate(data.get("shards", []), start=1):
+        try:
+            shard_text = output_path.with_name(name).read_text(encoding="utf-8")
+            records.extend(decode_columnar(_assigned_json(shard_text, f"window.PHONEBOOK_SHARDS[{idx}]")))
+        except (OSError, ValueError, KeyError):
+            return meta, None
+    return meta, records
+
+
+def record_keys(headers: list[str], records: list[dict[str, str]], id_column: str | None = None) -> list[str]:
+    column = id_column or guess_phone_column(headers, records)
+    seen: dict[str, int] = {}
+    keys = []
+    for record in records:
+        value = record.get(column, "") if column else ""
+        key = value.strip() if id_column else canonical_phone(value)
+        if not key:
+            key = hashlib.sha1(_minified([record.get(header, "") for header in headers]).encode("utf-8")).hexdigest()[:16]
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+def build_delta(
+    headers: list[str],
+    previous: list[dict[str, str]],
+    records: list[dict[str, str]],
+    id_column: str | None = None,
+) -> dict:
+    old = dict(zip(record_keys(headers, previous, id_column), previous))
+    new = dict(zip(record_keys(headers, records, id_column), records))
+    return {
+        "format": DELTA_FORMAT,
+        "v": 1,
+        "from": content_hash(headers, previous),
+        "to": content_hash(headers, records),
+        "idColumn": id_column,
+        "headers": headers,
+        "added": {key: record for key, record in new.items() if key not in old},
+        "changed": {key: record for key, record in new.items() if key in old and old[key] != record},
+        "removed": [key for key in old if key not in new],
+    }
+
+
+def delta_name(output_path: Path) -> str:
+    return f"{output_path.stem}_delta.json"
+
+
+def generated_files(output_path: Path) -> list[Path]:
+    stem, suffix = re.escape(output_path.stem), re.escape(output_path.suffix)
+    pattern = re.compile(rf"{stem}(?:\.\d+{suffix}|_index{suffix}|{suffix}|_delta\.json)(?:\.gz|\.br)?")
+    return [path for path in output_path.parent.glob(f"{output_path.stem}*") if pattern.fullmatch(path.name)]
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compressed_sizes(raw: bytes) -> tuple[int, int | None]:
+    brotli = _brotli()
+    gz = len(gzip.compress(raw, compresslevel=9, mtime=0))
+    return gz, len(brotli.compress(raw, quality=11)) if brotli else None
+
+
+def write_compressed(path: Path, raw: bytes) -> list[Path]:
+    written = [path.with_name(path.name + ".gz")]
+    written[0].write_bytes(gzip.compress(raw, compresslevel=9, mtime=0))
+    brotli = _brotli()
+    if brotli:
+        written.append(path.with_name(path.name + ".br"))
+        written[1].write_bytes(brotli.compress(raw, quality=11))
+    return written
+
+
+def estimate_parse_ms(value: object, compact: bool) -> float:
+    text = _minified(value) if compact else json.dumps(value, ensure_ascii=False, indent=2)
+    best = float("inf")
+    for _ in range(PARSE_SAMPLES):
+        started = time.perf_counter()
+        json.loads(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def print_report(headers: list[str], records: list[dict[str, str]], source_name: str, args: argparse.Namespace) -> None:
+    first, _rest = split_shards(records, args.first_page, max(1, args.shard_size or len(records)))
+    modes = [
+        ("pretty", generate_js(records, source_name), records, False),
+        ("compact", generate_compact_js(headers, records, source_name), columnar_payload(headers, records), True),
+        (
+            f"first page ({len(first)})",
+            generate_compact_js(headers, first, source_name, total=len(records)),
+            columnar_payload(headers, first),
+            True,
+        ),
+    ]
+    if not args.no_index:
+        index = build_index(headers, records)
+        modes.append(("search index", f"window.PHONEBOOK_INDEX={_minified(index)};\n", index, True))
+    print(f"{'mode':<18} {'bytes':>10} {'.gz':>10} {'.br':>10} {'parse':>10}")
+    for label, text, value, compact in modes:
+        raw = text.encode("utf-8")
+        gz, br = compressed_sizes(raw)
+        br_text = f"{br:>10}" if br is not None else f"{'-':>10}"
+        parse_ms = estimate_parse_ms(value, compact)
+        print(f"{label:<18} {len(raw):>10} {gz:>10} {br_text} {parse_ms:>7.2f} ms")
+    print("Parse estimates are Python json.loads timings; a phone WebView is typically several times slower.")
+
+
 def main() -> int:
     args = parse_args()
     input_path = Path(args.input)
@@ -92,11 +405,65 @@ def main() -> int:
         raise SystemExit(f"Input file not found: {input_path}")
 
     lines = read_xlsx_csv_lines(input_path, args.sheet)
-    _headers, records = parse_csv_lines(lines)
+    headers, records = parse_csv_lines(lines)
+
+    if args.report:
+        print_report(headers, records, input_path.name, args)
+
+    digest = content_hash(headers, records)
+    layout = output_layout(args)
+    previous_meta, previous_records = read_previous(output_path)
+    up_to_date = (
+        previous_meta is not None
+        and previous_meta.get("contentHash") == digest
+        and previous_meta.get("layout") == layout
+    )
+    if args.check:
+        if up_to_date:
+            print(f"{output_path} is up to date ({digest[:12]}).")
+            return 0
+        print(f"{output_path} is out of date with {input_path}.", file=sys.stderr)
+        return 1
+    if up_to_date and not args.force:
+        print(f"{output_path} is up to date ({digest[:12]}); nothing written.")
+        return 0
+
+    outputs: dict[Path, str] = {}
+    index = None if args.no_index else index_name(output_path)
+    extra_meta: dict[str, object] = {"contentHash": digest, "layout": layout}
+    if index:
+        extra_meta["index"] = index
+    if args.shard_size > 0:
+        first, shards = split_shards(records, args.first_page, args.shard_size)
+        names = shard_names(output_path, len(shards))
+        outputs[output_path] = generate_compact_js(headers, first, input_path.name, len(records), names, extra_meta)
+        for idx, (name, shard) in enumerate(zip(names, shards), start=1):
+            outputs[output_path.with_name(name)] = generate_shard_js(idx, headers, shard)
+    elif args.compact:
+        outputs[output_path] = generate_compact_js(headers, records, input_path.name, extra_meta=extra_meta)
+    else:
+        outputs[output_path] = generate_js(records, input_path.name, extra_meta)
+    if args.delta and previous_records is not None:
+        delta = build_delta(headers, previous_records, records, args.id_column)
+        if delta["from"] != delta["to"]:
+            outputs[output_path.with_name(delta_name(output_path))] = _minified(delta) + "\n"
+    if index:
+        outputs[output_path.with_name(index)] = generate_index_js(headers, records)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(generate_js(records, input_path.name), encoding="utf-8")
-    print(f"Wrote {len(records)} records to {output_path}")
+    written = set(outputs)
+    for path, text in outputs.items():
+        raw = text.encode("utf-8")
+        path.write_bytes(raw)
+        if args.compress:
+            written.update(write_compressed(path, raw))
+    # Shards, deltas, indexes and compressed copies left by an earlier layout would still be served.
+    stale = [path for path in generated_files(output_path) if path not in written]
+    for path in stale:
+        path.unlink()
+    size = sum(len(text.encode("utf-8")) for text in outputs.values())
+    removed = f", removed {len(stale)} stale file(s)" if stale else ""
+    print(f"Wrote {len(records)} records to {output_path} ({len(outputs)} file(s), {size} bytes{removed})")
     return 0
 
 
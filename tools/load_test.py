@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare requests per second of http.server and `main.py serve`")
+    parser.add_argument("--root", default=str(ROOT / "mobile"), help="Directory to serve (default: mobile/)")
+    parser.add_argument("--path", default="/phonebook_data.js", help="Path to request (default: /phonebook_data.js)")
+    parser.add_argument("--search", help="Also load-test /api/search?q=SEARCH on the asyncio server")
+    parser.add_argument("--csv", help="Data file for the search API")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per server (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--gzip", action="store_true", help="Send Accept-Encoding: gzip, br")
+    parser.add_argument("--conditional", action="store_true", help="Revalidate with If-None-Match/If-Modified-Since")
+    parser.add_argument("--port", type=int, default=8801, help="First port to use (default: 8801)")
+    return parser.parse_args(argv)
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, dict[str, str], int, bool]:
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    version, status = head[0].split(" ")[:2]
+    headers = {}
+    for line in head[1:]:
+        name, _sep, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    length = "0" if status in ("204", "304") else headers.get("content-length")
+    if length is not None:
+        body = await reader.readexactly(int(length))
+    else:
+        body = await reader.read()
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close" and length is not None
+    return int(status), headers, len(body), keep_alive
+
+
+async def request_once(port: int, request: bytes) -> tuple[int, dict[str, str], int, bool]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        return await read_response(reader)
+    finally:
+        writer.close()
+
+
+async def run_load(port: int, request: bytes, total: int, concurrency: int) -> tuple[float, Counter, int]:
+    statuses: Counter = Counter()
+    transferred = 0
+    remaining = total
+
+    async def client() -> None:
+        nonlocal remaining, transferred
+        reader = writer = None
+        while remaining > 0:
+            remaining -= 1
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(request)
+                await writer.drain()
+                status, _headers, size, keep_alive = await read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                statuses[type(e).__name__] += 1
+                keep_alive = False
+            else:
+                statuses[status] += 1
+                transferred += size
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, statuses, transferred
+
+
+def build_request(path: str, args: argparse.Namespace, port: int) -> bytes:
+    lines = [f"GET {path} HTTP/1.1", f"Host: 127.0.0.1:{port}"]
+    if args.gzip:
+        lines.append("Accept-Encoding: gzip, br")
+    if args.conditional:
+        status, headers, _size, _keep = asyncio.run(request_once(port, ("\r\n".join(lines) + "\r\n\r\n").encode()))
+        if status == 200 and "etag" in headers:
+            lines.append(f"If-None-Match: {headers['etag']}")
+        if status == 200 and "last-modified" in headers:
+            lines.append(f"If-Modified-Since: {headers['last-modified']}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def measure(label: str, command: list[str], port: int, paths: list[str], args: argparse.Namespace) -> None:
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        for path in paths:
+            request = build_request(path, args, port)
+            elapsed, statuses, transferred = asyncio.run(run_load(port, request, args.requests, args.concurrency))
+            codes = ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items(), key=str))
+            print(
+                f"{label:<16} {path[:40]:<40} {args.requests / elapsed:9.0f} req/s "
+                f"{transferred / elapsed / 1024 / 1024:8.1f} MiB/s  ({codes})"
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> int:
+    args = parse_args()
+    stdlib_port, async_port = args.port, args.port + 1
+    measure(
+        "http.server",
+        [sys.executable, "-m", "http.server", str(stdlib_port), "--bind", "127.0.0.1", "--directory", args.root],
+        stdlib_port,
+        [args.path],
+        args,
+    )
+    serve = [sys.executable, "main.py", "serve", "--host", "127.0.0.1", "--port", str(async_port), "--root", args.root]
+    if args.csv:
+        serve += ["--csv", args.csv]
+    paths = [args.path]
+    if args.search:
+        paths.append(f"/api/search?q={quote(args.search)}")
+    measure("main.py serve", serve, async_port, paths, args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
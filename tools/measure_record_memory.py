@@ -0,0 +1,55 @@
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import RecordTable  # noqa: E402
+from synthetic_phonebook import HEADERS, generate_rows  # noqa: E402
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare memory of list-of-dict records with RecordTable")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of synthetic rows (default: 100000)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    return parser.parse_args(argv)
+
+
+def measure(build) -> tuple[int, object]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main() -> int:
+    args = parse_args()
+    # Each benchmark row re-creates its strings (like a parser would) so interning is measured honestly.
+    rows = list(generate_rows(args.rows, args.seed))
+
+    def build_dicts():
+        records = [{h: "".join(v) for h, v in zip(HEADERS, row)} for row in rows]
+        return records, list(records)
+
+    def build_table():
+        table = RecordTable(HEADERS)
+        for row in rows:
+            table.append(["".join(v) for v in row])
+        return table, table.view()
+
+    dict_bytes, _dicts = measure(build_dicts)
+    del _dicts
+    table_bytes, _table = measure(build_table)
+
+    print(f"Rows: {args.rows}")
+    print(f"list[dict] + filtered copy: {dict_bytes / 1024 / 1024:8.1f} MiB ({dict_bytes / args.rows:6.0f} B/row)")
+    print(f"RecordTable + view:         {table_bytes / 1024 / 1024:8.1f} MiB ({table_bytes / args.rows:6.0f} B/row)")
+    print(f"Saved: {(1 - table_bytes / dict_bytes) * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import openpyxl
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import read_xlsx_records  # noqa: E402
+from synthetic_phonebook import write_phonebook  # noqa: E402
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare full-mode and streaming .xlsx loading")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Workbook sizes to measure (default: 10000 100000)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    return parser.parse_args(argv)
+
+
+def read_full_mode(path: Path) -> int:
+    wb = openpyxl.load_workbook(path, data_only=True)
+    ws = wb[wb.sheetnames[0]]
+    count = 0
+    for r in range(2, ws.max_row + 1):
+        values = [ws.cell(row=r, column=c).value for c in range(1, ws.max_column + 1)]
+        if any(v is not None for v in values):
+            count += 1
+    return count
+
+
+def read_streaming(path: Path) -> int:
+    _headers, table = read_xlsx_records(str(path))
+    return len(table)
+
+
+def measure(fn, path: Path) -> tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = fn(path)
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, rows
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.rows:
+            path = Path(tmp) / f"phonebook_{count}.xlsx"
+            write_phonebook(path, count, "xlsx", args.seed)
+            for label, fn in (("full mode + ws.cell()", read_full_mode), ("read_only + iter_rows", read_streaming)):
+                elapsed, peak, rows = measure(fn, path)
+                print(f"{count:>8} rows  {label:<24} {elapsed:7.2f} s  peak {peak / 1024 / 1024:8.1f} MiB  ({rows} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
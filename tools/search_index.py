@@ -0,0 +1,213 @@
+import re
+import sys
+from bisect import bisect_left
+from collections.abc import Iterable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phonebook import (  # noqa: E402
+    PHONE_GRAM_SIZE,
+    RecordTable,
+    canonical_phone,
+    guess_phone_column,
+    phone_like_columns,
+    phone_query,
+)
+
+INDEX_FORMAT = "phonebook-index"
+GRAM_SIZE = 3
+PREFIX_LENGTH = 2
+COMMON_GRAM_RATIO = 0.5
+PHOTO_FIELD = "Photo"
+
+_TOKEN_SEPARATORS = re.compile(r"[\s.,;:()/\\\-@+'\"]+")
+
+
+def normalize_text(value: str) -> str:
+    # Same as normalizeText() in mobile/app.js.
+    return value.strip().lower()
+
+
+def record_text(headers: list[str], record: dict[str, str]) -> str:
+    parts = []
+    for header in headers:
+        value = record.get(header, "")
+        if not value or header == PHOTO_FIELD:
+            continue
+        if len(value) > 300 and value.startswith("data:image"):
+            continue
+        parts.append(value)
+    return normalize_text(" ".join(parts))
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN_SEPARATORS.split(text) if token]
+
+
+def _grams(text: str, size: int) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def _postings(keys_per_record: Iterable[Iterable[str]]) -> dict[str, list[int]]:
+    postings: dict[str, list[int]] = {}
+    for record_id, keys in enumerate(keys_per_record):
+        for key in keys:
+            bucket = postings.get(key)
+            if bucket is None:
+                postings[key] = [record_id]
+            else:
+                bucket.append(record_id)
+    return postings
+
+
+def _encode(ids: list[int]) -> list[int]:
+    previous = 0
+    out = []
+    for record_id in ids:
+        out.append(record_id - previous)
+        previous = record_id
+    return out
+
+
+def _decode(deltas: list[int]) -> list[int]:
+    total = 0
+    out = []
+    for delta in deltas:
+        total += delta
+        out.append(total)
+    return out
+
+
+def record_phones(headers: list[str], records: list[dict[str, str]]) -> tuple[list[str], list[str]]:
+    table = RecordTable(headers)
+    for record in records:
+        table.append([record.get(header, "") for header in headers])
+    columns = phone_like_columns(table, guess_phone_column(headers, table))
+    phones = [" ".join(filter(None, (canonical_phone(record.get(col, "")) for col in columns))) for record in records]
+    return columns, phones
+
+
+def build_index(headers: list[str], records: list[dict[str, str]]) -> dict:
+    texts = [record_text(headers, record) for record in records]
+    phone_columns, phones = record_phones(headers, records)
+
+    grams = _postings(_grams(text, GRAM_SIZE) for text in texts)
+    common_limit = COMMON_GRAM_RATIO * len(records)
+    common = sorted(gram for gram, ids in grams.items() if len(ids) > common_limit)
+    for gram in common:
+        del grams[gram]
+
+    tokens = _postings(set(tokenize(text)) for text in texts)
+    vocabulary = sorted(tokens)
+    prefixes = _postings(
+        {token[:length] for token in set(tokenize(text)) for length in range(1, PREFIX_LENGTH + 1)} for text in texts
+    )
+    phone_grams = _postings(_grams(phone, PHONE_GRAM_SIZE) for phone in phones)
+
+    return {
+        "format": INDEX_FORMAT,
+        "v": 1,
+        "count": len(records),
+        "gramSize": GRAM_SIZE,
+        "prefixLength": PREFIX_LENGTH,
+        "phoneGramSize": PHONE_GRAM_SIZE,
+        "grams": {gram: _encode(ids) for gram, ids in grams.items()},
+        "commonGrams": common,
+        "tokens": vocabulary,
+        "tokenPostings": [_encode(tokens[token]) for token in vocabulary],
+        "prefixes": {prefix: _encode(ids) for prefix, ids in prefixes.items()},
+        "phoneColumns": phone_columns,
+        "phones": phones,
+        "phoneGrams": {gram: _encode(ids) for gram, ids in phone_grams.items()},
+    }
+
+
+class SearchIndex:
+    def __init__(self, payload: dict) -> None:
+        if payload.get("format") != INDEX_FORMAT:
+            raise ValueError("Not a phone book search index.")
+        self.count: int = payload["count"]
+        self.gram_size: int = payload["gramSize"]
+        self.prefix_length: int = payload["prefixLength"]
+        self.phone_gram_size: int = payload["phoneGramSize"]
+        self.grams = {gram: _decode(ids) for gram, ids in payload["grams"].items()}
+        self.common_grams = set(payload["commonGrams"])
+        self.tokens: list[str] = payload["tokens"]
+        self.token_postings = [_decode(ids) for ids in payload["tokenPostings"]]
+        self.prefixes = {prefix: _decode(ids) for prefix, ids in payload["prefixes"].items()}
+        self.phones: list[str] = payload["phones"]
+        self.phone_grams = {gram: _decode(ids) for gram, ids in payload["phoneGrams"].items()}
+
+    def _candidates(self, postings: dict[str, list[int]], grams: set[str], skip: set[str]) -> list[int] | None:
+        rarest: list[int] | None = None
+        for gram in grams:
+            if gram in skip:
+                continue
+            ids = postings.get(gram)
+            if ids is None:
+                return []
+            if rarest is None or len(ids) < len(rarest):
+                rarest = ids
+        return rarest
+
+    def search(self, texts: list[str], query: str) -> list[int]:
+        text = normalize_text(query)
+        if not text:
+            return list(range(self.count))
+
+        candidates = None
+        if len(text) >= self.gram_size:
+            candidates = self._candidates(self.grams, _grams(text, self.gram_size), self.common_grams)
+        hits = {record_id for record_id in (range(self.count) if candidates is None else candidates) if text in texts[record_id]}
+
+        digits = phone_query(query)
+        if digits:
+            candidates = None
+            if len(digits) >= self.phone_gram_size:
+                candidates = self._candidates(self.phone_grams, _grams(digits, self.phone_gram_size), set())
+            phones = self.phones
+            hits.update(
+                record_id for record_id in (range(self.count) if candidates is None else candidates) if digits in phones[record_id]
+            )
+        return sorted(hits)
+
+    def _prefix_ids(self, token: str) -> set[int]:
+        if len(token) <= self.prefix_length:
+            return set(self.prefixes.get(token, ()))
+        tokens = self.tokens
+        ids: set[int] = set()
+        for pos in range(bisect_left(tokens, token), len(tokens)):
+            if not tokens[pos].startswith(token):
+                break
+            ids.update(self.token_postings[pos])
+        return ids
+
+    def prefix_search(self, query: str) -> list[int]:
+        hits: set[int] | None = None
+        for token in tokenize(normalize_text(query)):
+            ids = self._prefix_ids(token)
+            hits = ids if hits is None else hits & ids
+            if not hits:
+                break
+        return list(range(self.count)) if hits is None else sorted(hits)
+
+
+def scan_search(texts: list[str], phones: list[str], query: str) -> list[int]:
+    text = normalize_text(query)
+    digits = phone_query(query)
+    return [
+        record_id
+        for record_id, haystack in enumerate(texts)
+        if text in haystack or (digits and digits in phones[record_id])
+    ]
+
+
+def scan_prefix_search(texts: list[str], query: str) -> list[int]:
+    tokens = tokenize(normalize_text(query))
+    out = []
+    for record_id, text in enumerate(texts):
+        record_tokens = tokenize(text)
+        if all(any(candidate.startswith(token) for candidate in record_tokens) for token in tokens):
+            out.append(record_id)
+    return out
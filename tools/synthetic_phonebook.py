@@ -0,0 +1,145 @@
+import argparse
+import csv
+import io
+import random
+from collections.abc import Iterator
+from pathlib import Path
+
+HEADERS = ["Name", "Department", "Designation", "Phone", "Email"]
+LATIN_FIRST = (
+    "Rahim Karim Farzana Sanjida Nusrat Abdul Rahman Rahaman Yousuf Taslima "
+    "Shahidul Mahmuda Anwar Rokeya Habib Sultana Kamal Jahanara Mizanur Shirin"
+).split()
+LATIN_LAST = (
+    "Uddin Akter Hossain Islam Rahman Begum Khatun Chowdhury Miah Sarker "
+    "Ahmed Haque Sultana Jahan Karim Bhuiyan Talukder Mollah Sheikh Das"
+).split()
+LATIN_PREFIX = ["", "", "", "Md. ", "Mohammad ", "Muhammad ", "Md ", "Mst. "]
+BANGLA_FIRST = "রহিম করিম ফারজানা সানজিদা নুসরাত আব্দুল ইউসুফ তাসলিমা শহিদুল মাহমুদা".split()
+BANGLA_LAST = "উদ্দিন আক্তার হোসেন ইসলাম রহমান বেগম খাতুন চৌধুরী মিয়া সরকার".split()
+BANGLA_PREFIX = ["", "", "মো. ", "মোছা. "]
+DEPARTMENTS = [
+    "Bangla",
+    "English",
+    "Mathematics",
+    "Physics",
+    "Chemistry",
+    "Botany",
+    "Zoology",
+    "History",
+    "Economics",
+    "Political Science",
+    "Accounting",
+    "Management",
+    "বাংলা বিভাগ",
+    "ইসলামিক স্টাডিজ বিভাগ",
+    "দর্শন বিভাগ",
+    "সমাজকর্ম বিভাগ",
+]
+DESIGNATIONS = [
+    "Lecturer",
+    "Assistant Professor",
+    "Associate Professor",
+    "Professor",
+    "প্রভাষক",
+    "সহকারী অধ্যাপক",
+    "সহযোগী অধ্যাপক",
+    "অধ্যাপক",
+]
+FORMATS = ("csv", "semicolon", "xlsx", "xlsx-packed")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic teacher phone book for testing and benchmarks")
+    parser.add_argument("--rows", type=int, default=1000, help="Number of teachers (default: 1000)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Output format (default: csv)")
+    parser.add_argument("--output", required=True, help="Output file")
+    return parser.parse_args(argv)
+
+
+def _phone(rng: random.Random) -> str:
+    if rng.random() < 0.06:
+        return ""
+    number = f"1{rng.choice('3456789')}{rng.randrange(10**8):08d}"
+    style = rng.randrange(6)
+    if style == 0:
+        return f"0{number}"
+    if style == 1:
+        return f"+880{number}"
+    if style == 2:
+        return f"880{number}"
+    if style == 3:
+        return f"0{number[:4]}-{number[4:]}"
+    if style == 4:
+        return f"0{number[:4]} {number[4:7]} {number[7:]}"
+    return f"+880 {number[:4]}-{number[4:]}"
+
+
+def generate_rows(count: int, seed: int = 1) -> Iterator[list[str]]:
+    rng = random.Random(seed)
+    for idx in range(count):
+        if rng.random() < 0.3:
+            name = f"{rng.choice(BANGLA_PREFIX)}{rng.choice(BANGLA_FIRST)} {rng.choice(BANGLA_LAST)}"
+            email = ""
+        else:
+            first, last = rng.choice(LATIN_FIRST), rng.choice(LATIN_LAST)
+            name = f"{rng.choice(LATIN_PREFIX)}{first} {last}"
+            email = f"{first.lower()}.{last.lower()}{idx}@example.com" if rng.random() < 0.8 else ""
+        department = rng.choice(DEPARTMENTS) if rng.random() < 0.97 else ""
+        designation = rng.choice(DESIGNATIONS) if rng.random() < 0.95 else ""
+        yield [name, department, designation, _phone(rng), email]
+
+
+def write_csv(path: Path, rows: Iterator[list[str]], delimiter: str = ",") -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+
+
+def write_xlsx(path: Path, rows: Iterator[list[str]], packed: bool = False) -> None:
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    if not packed:
+        ws.append(HEADERS)
+        for row in rows:
+            ws.append(row)
+    else:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="")
+        for row in [HEADERS, *rows]:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            ws.append([buffer.getvalue()])
+    wb.save(path)
+
+
+def write_phonebook(path: Path, count: int, fmt: str, seed: int = 1) -> None:
+    rows = generate_rows(count, seed)
+    if fmt == "csv":
+        write_csv(path, rows)
+    elif fmt == "semicolon":
+        write_csv(path, rows, delimiter=";")
+    elif fmt == "xlsx":
+        write_xlsx(path, rows)
+    elif fmt == "xlsx-packed":
+        write_xlsx(path, rows, packed=True)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def main() -> int:
+    args = parse_args()
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_phonebook(output, args.rows, args.format, args.seed)
+    print(f"Wrote {args.rows} teachers to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())